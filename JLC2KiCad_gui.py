@@ -1,64 +1,77 @@
 #!/usr/bin/env python
-import json
 import logging
 import os
 import re
-import sys
-import tempfile
+import threading
 
 import pcbnew
-import requests
 import wx
 
+from .batch_download import (
+    DEFAULT_JOBS,
+    MAX_JOBS,
+    parse_part_numbers,
+    read_bom_part_numbers,
+    run_batch,
+)
+from .board_sync import STATUS_MISSING, STATUS_PRESENT, plan_sync, scan_board
+from .download_job import STAGES, DownloadJob
+from .generation_pool import get_generation_pool
 from .core_library_installer import (
     REPO_URL,
     get_core_version,
-    get_latest_core_version,
     install_or_upgrade_core,
 )
+from . import perf_stats
+from .http_client import job_context
+from .model_fetcher import STATE_FAILED, STATE_QUEUED, STATE_DOWNLOADING, STATE_RETRY, get_model_fetcher
+from .part_pipeline import (
+    OUTPUT_FOLDER,
+    ComponentLookupError,
+    batched_symbol_writes,
+    fetch_part,
+    load_core_library,
+    project_library_index,
+    render_footprint,
+    unload_core_library,
+)
+from .part_index import get_part_index
+from .placement import PlacementEngine
+from .plugin_config import get_setting
+from .plugin_logging import setup_logging
+from .request_scheduler import PRIORITY_BACKGROUND, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from .version_check import cached_latest_core_version, check_in_background
+
 
 
-OUTPUT_FOLDER = "JLC2KiCad_lib"
-FOOTPRINT_LIB  = "footprint"
-FOOTPRINT_LIB_NICK  = "jlc"  #set the same as FOOTPRINT_LIB, or to nickname choosen in Footprint libraries manager
-SYMBOL_LIB = "default_lib"
-SYMBOL_LIB_DIR = "symbol"
+# Wait this long after the last keystroke before prefetching the typed part
+PREFETCH_DELAY_MS = 500
+# and this long before searching the index of fetched parts
+SEARCH_DELAY_MS = 150
 
 
-helper = None
-create_footprint = None
-create_symbol = None
+# Footprints rendered by prefetches during this KiCad session, (component_id, refresh) -> (component_name, footprint text)
+_prefetched_parts = {}
 
 
-def _core_version_text():
+def _core_version_text(latest_version=None):
     version = get_core_version()
-    return (
+    text = (
         f"JLC2KiCad library v{version}"
         if version
         else "JLC2KiCad library not installed"
     )
-
-
-def _load_gui_core_library():
-    global helper, create_footprint, create_symbol
-
-    if helper and create_footprint and create_symbol:
-        return
-
-    from JLC2KiCadLib import helper as _helper
-    from JLC2KiCadLib.footprint.footprint import create_footprint as _create_footprint
-    from JLC2KiCadLib.symbol.symbol import create_symbol as _create_symbol
-
-    helper = _helper
-    create_footprint = _create_footprint
-    create_symbol = _create_symbol
+    if version and latest_version and latest_version != version:
+        text += f" (v{latest_version} available)"
+    return text
 
 
 def _check_gui_core_library(parent=None):
-    global helper, create_footprint, create_symbol
-
     try:
-        _load_gui_core_library()
+        load_core_library()
+        pool = get_generation_pool()
+        if pool is not None:
+            pool.warm_up()
         return True
     except ModuleNotFoundError:
         answer = wx.MessageBox(
@@ -69,11 +82,9 @@ def _check_gui_core_library(parent=None):
         )
         if answer == wx.YES:
             if install_or_upgrade_core(prompt_reason="missing", prompt_user=False):
-                helper = None
-                create_footprint = None
-                create_symbol = None
+                unload_core_library()
                 try:
-                    _load_gui_core_library()
+                    load_core_library()
                     return True
                 except Exception:
                     pass
@@ -109,7 +120,7 @@ class MyCustomDialog(wx.Dialog):
         header_row = wx.BoxSizer(wx.HORIZONTAL)
         header_row.Add(wx.StaticText(self, label=message), 0, wx.ALL | wx.ALIGN_CENTER_VERTICAL, 10)
         header_row.AddStretchSpacer(1)
-        self.core_version_label = wx.StaticText(self, label=_core_version_text())
+        self.core_version_label = wx.StaticText(self, label=_core_version_text(cached_latest_core_version()))
         header_row.Add(self.core_version_label, 0, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 8)
         self.update_button = wx.Button(self, wx.ID_ANY, "Check for updates")
         header_row.Add(self.update_button, 0, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 10)
@@ -119,17 +130,61 @@ class MyCustomDialog(wx.Dialog):
         self.text_entry = wx.TextCtrl(self, style=wx.TE_PROCESS_ENTER)
         sizer.Add(self.text_entry, 0, wx.ALL | wx.EXPAND, 10)
 
+        # Previously fetched parts matching the typed text, hidden while there are none
+        self.search_results = wx.ListBox(self, size=(-1, 120), style=wx.LB_SINGLE)
+        sizer.Add(self.search_results, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM | wx.EXPAND, 10)
+        self.search_results.Hide()
+
+        self.refresh_checkbox = wx.CheckBox(self, label="Force refresh (ignore cached part lookup)")
+        sizer.Add(self.refresh_checkbox, 0, wx.LEFT | wx.RIGHT | wx.EXPAND, 10)
+
+        self.defer_models_checkbox = wx.CheckBox(self, label="Don't wait for 3D models (fetched in background)")
+        self.defer_models_checkbox.SetValue(bool(get_setting("defer_3d_models")))
+        sizer.Add(self.defer_models_checkbox, 0, wx.LEFT | wx.RIGHT | wx.TOP | wx.EXPAND, 10)
+
+        # Download progress, shown while a download runs in the background
+        progress_row = wx.BoxSizer(wx.HORIZONTAL)
+        self.progress_gauge = wx.Gauge(self, range=len(STAGES))
+        progress_row.Add(self.progress_gauge, 1, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 8)
+        self.progress_label = wx.StaticText(self, label="", size=(140, -1))
+        progress_row.Add(self.progress_label, 0, wx.ALIGN_CENTER_VERTICAL)
+        sizer.Add(progress_row, 0, wx.LEFT | wx.RIGHT | wx.TOP | wx.EXPAND, 10)
+
+        # Background 3D model downloads, these outlive the dialog
+        model_row = wx.BoxSizer(wx.HORIZONTAL)
+        self.model_status_label = wx.StaticText(self, label="")
+        model_row.Add(self.model_status_label, 1, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 8)
+        self.retry_models_button = wx.Button(self, wx.ID_ANY, "Retry failed 3D models")
+        model_row.Add(self.retry_models_button, 0, wx.ALIGN_CENTER_VERTICAL)
+        sizer.Add(model_row, 0, wx.LEFT | wx.RIGHT | wx.TOP | wx.EXPAND, 10)
+
         # Add custom buttons, right-aligned.
         button_row = wx.BoxSizer(wx.HORIZONTAL)
         button_row.AddStretchSpacer(1)
 
         ok_button = wx.Button(self, wx.ID_OK, "Copy to clipboard")
         download_button = wx.Button(self, wx.ID_APPLY, "Download to project library")
+        batch_button = wx.Button(self, wx.ID_ANY, "Batch...")
+        sync_button = wx.Button(self, wx.ID_ANY, "Sync board...")
+        stats_button = wx.Button(self, wx.ID_ANY, "Stats...")
         cancel_button = wx.Button(self, wx.ID_CANCEL, "Cancel")
         help_button = wx.Button(self, wx.ID_HELP, "Help")
+        self._job_buttons = [ok_button, download_button, batch_button, sync_button, self.update_button]
+        self.libpath = ""
+        self.component_name = ""
+        self.footprint_text = ""
+        self._job = None
+        self._prefetch_job = None
+        self._prefetch_key = None
+        self._prefetch_timer = None
+        self._search_timer = None
+        self._search_hits = []
 
         button_row.Add(ok_button, 0, wx.LEFT, 6)
         button_row.Add(download_button, 0, wx.LEFT, 6)
+        button_row.Add(batch_button, 0, wx.LEFT, 6)
+        button_row.Add(sync_button, 0, wx.LEFT, 6)
+        button_row.Add(stats_button, 0, wx.LEFT, 6)
         button_row.Add(cancel_button, 0, wx.LEFT, 6)
         button_row.Add(help_button, 0, wx.LEFT, 6)
 
@@ -139,10 +194,25 @@ class MyCustomDialog(wx.Dialog):
         self.Fit()
 
         self.Bind(wx.EVT_BUTTON, self.OnDownload, id=wx.ID_APPLY)
+        self.Bind(wx.EVT_BUTTON, self.OnBatch, id=batch_button.GetId())
+        self.Bind(wx.EVT_BUTTON, self.OnSyncBoard, id=sync_button.GetId())
+        self.Bind(wx.EVT_BUTTON, self.OnStats, id=stats_button.GetId())
         self.Bind(wx.EVT_BUTTON, self.OnUpdateCoreLibrary, id=self.update_button.GetId())
         self.Bind(wx.EVT_BUTTON, self.OnPlaceFootprint, id=wx.ID_OK)
         self.Bind(wx.EVT_BUTTON, self.OnCancel, id=wx.ID_CANCEL)
         self.Bind(wx.EVT_BUTTON, self.OnHelp, id=wx.ID_HELP)
+        self.Bind(wx.EVT_CLOSE, self.OnClose)
+        self.Bind(wx.EVT_TEXT, self.OnPartNumberChanged, id=self.text_entry.GetId())
+        self.Bind(wx.EVT_TEXT_ENTER, self.OnPartNumberEnter, id=self.text_entry.GetId())
+        self.text_entry.Bind(wx.EVT_KEY_DOWN, self.OnPartNumberKey)
+        self.Bind(wx.EVT_LISTBOX, self.OnSearchResultPicked, id=self.search_results.GetId())
+        self.Bind(wx.EVT_CHECKBOX, self.OnPartNumberChanged, id=self.refresh_checkbox.GetId())
+        self.Bind(wx.EVT_BUTTON, self.OnRetryModels, id=self.retry_models_button.GetId())
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.OnDestroy)
+
+        get_model_fetcher().add_listener(self._on_model_state)
+        self._update_model_status()
+        check_in_background(lambda version: wx.CallAfter(self._on_latest_version, version))
 
         
         self.SetDefaultItem(ok_button)
@@ -173,8 +243,228 @@ class MyCustomDialog(wx.Dialog):
         if part_number:
             self.text_entry.SetValue(part_number)
             self.text_entry.SelectAll()
+            self._start_prefetch()
         self.text_entry.SetFocus()
 
+    def OnPartNumberChanged(self, event):
+        event.Skip()
+        if self._prefetch_timer is not None:
+            self._prefetch_timer.Stop()
+        self._prefetch_timer = wx.CallLater(PREFETCH_DELAY_MS, self._start_prefetch)
+        if event.GetEventObject() is self.text_entry:
+            self._stop_search_timer()
+            self._search_timer = wx.CallLater(SEARCH_DELAY_MS, self._search)
+
+    def _search(self):
+        # Local only, the index answers in milliseconds
+        self._search_timer = None
+        if not self:
+            return
+        text = self.text_entry.GetValue().strip()
+        index = get_part_index()
+        hits = index.search(text) if index is not None and text else []
+        if len(hits) == 1 and hits[0].component_id.lower() == text.lower():
+            hits = []
+        self._show_search_hits(hits)
+
+    def _stop_search_timer(self):
+        if self._search_timer is not None:
+            self._search_timer.Stop()
+            self._search_timer = None
+
+    def _show_search_hits(self, hits):
+        self._search_hits = hits
+        self.search_results.Set([
+            "   ".join(value for value in (hit.component_id, hit.symbol or hit.footprint, hit.description) if value)
+            for hit in hits
+        ])
+        if self.search_results.IsShown() != bool(hits):
+            self.search_results.Show(bool(hits))
+            self.Fit()
+
+    def OnPartNumberKey(self, event):
+        # Up/Down choose a search result, Escape hides the results
+        key = event.GetKeyCode()
+        if not self._search_hits or key not in (wx.WXK_UP, wx.WXK_DOWN, wx.WXK_ESCAPE):
+            event.Skip()
+            return
+        if key == wx.WXK_ESCAPE:
+            self._show_search_hits([])
+            return
+        selection = self.search_results.GetSelection()
+        if selection == wx.NOT_FOUND:
+            selection = 0 if key == wx.WXK_DOWN else len(self._search_hits) - 1
+        else:
+            selection = max(0, min(len(self._search_hits) - 1, selection + (1 if key == wx.WXK_DOWN else -1)))
+        self.search_results.SetSelection(selection)
+
+    def OnPartNumberEnter(self, event):
+        selection = self.search_results.GetSelection() if self._search_hits else wx.NOT_FOUND
+        if selection == wx.NOT_FOUND:
+            # Leaves Enter to the default button
+            event.Skip()
+            return
+        self._pick_search_hit(selection)
+
+    def OnSearchResultPicked(self, event):
+        if event.GetSelection() != wx.NOT_FOUND:
+            self._pick_search_hit(event.GetSelection())
+
+    def _pick_search_hit(self, selection):
+        # The part was fetched before, its prefetch is served from the part store right away
+        hit = self._search_hits[selection]
+        self._stop_search_timer()
+        self._stop_prefetch_timer()
+        self.text_entry.ChangeValue(hit.component_id)
+        self.text_entry.SetInsertionPointEnd()
+        self.text_entry.SetFocus()
+        self._show_search_hits([])
+        self._start_prefetch()
+
+    def _start_prefetch(self):
+        # Generate the footprint in the background so "Copy to clipboard" is usually instant
+        self._prefetch_timer = None
+        if not self:
+            return
+        component_id = self.text_entry.GetValue().strip()
+        if not re.fullmatch(r"C\d+", component_id):
+            return
+        key = (component_id, self.refresh_checkbox.GetValue())
+        if key == self._prefetch_key and self._prefetch_job is not None:
+            return
+        if key in _prefetched_parts:
+            self._show_prefetch_status(f"{component_id} ready")
+            return
+
+        self._cancel_prefetch()
+        defer_models = self.defer_models_checkbox.GetValue()
+
+        def target(progress):
+            return render_footprint(component_id, key[1], progress, defer_models)
+
+        def on_stage(stage):
+            wx.CallAfter(self._on_job_stage, job, stage)
+
+        def on_done(result, error):
+            wx.CallAfter(self._on_prefetch_done, job, key, result, error)
+
+        job = DownloadJob(target, on_stage=on_stage, on_done=on_done, name="jlc-prefetch", priority=PRIORITY_BACKGROUND)
+        self._prefetch_job = job
+        self._prefetch_key = key
+        self._show_prefetch_status(f"prefetching {component_id}...")
+        job.start()
+
+    def _cancel_prefetch(self):
+        # An abandoned prefetch is stopped, finished ones stay in _prefetched_parts
+        if self._prefetch_job is not None and self._prefetch_job is not self._job:
+            self._prefetch_job.cancel()
+        self._prefetch_job = None
+        self._prefetch_key = None
+
+    def _stop_prefetch_timer(self):
+        if self._prefetch_timer is not None:
+            self._prefetch_timer.Stop()
+            self._prefetch_timer = None
+
+    def _show_prefetch_status(self, text):
+        if self._job is None:
+            self.progress_label.SetLabel(text)
+
+    def _on_prefetch_done(self, job, key, result, error):
+        if error is None and result and result[0]:
+            _prefetched_parts[key] = result
+        if not self:
+            return
+        if job is self._job:
+            # "Copy to clipboard" was pressed while this prefetch was still running
+            self._prefetch_job = None
+            self._on_job_done(job, key[0], result, error, self._end_with_footprint)
+        elif job is self._prefetch_job:
+            self._prefetch_job = None
+            self._show_prefetch_status(f"{key[0]} ready" if error is None else "")
+
+    def _use_prefetched(self, key):
+        result = _prefetched_parts.get(key)
+        if result:
+            self._end_with_footprint(result)
+            return True
+        return False
+
+
+    def _on_model_state(self, path, state):
+        wx.CallAfter(self._update_model_status)
+
+    def _update_model_status(self):
+        if not self:
+            return
+        counts = get_model_fetcher().summary()
+        pending = sum(counts.get(state, 0) for state in (STATE_QUEUED, STATE_DOWNLOADING, STATE_RETRY))
+        failed = counts.get(STATE_FAILED, 0)
+        parts = []
+        if pending:
+            parts.append(f"{pending} downloading")
+        if failed:
+            parts.append(f"{failed} failed")
+        self.model_status_label.SetLabel(f"3D models: {', '.join(parts)}" if parts else "")
+        self.retry_models_button.Show(bool(failed))
+        self.Layout()
+
+    def OnRetryModels(self, event):
+        get_model_fetcher().retry_failed()
+        self._update_model_status()
+
+    def OnDestroy(self, event):
+        event.Skip()
+        if event.GetEventObject() is self:
+            get_model_fetcher().remove_listener(self._on_model_state)
+
+    def _start_job(self, component_id, target, on_success):
+        # target(progress) runs on the job's thread, on_success(result) on the GUI thread
+        def on_stage(stage):
+            wx.CallAfter(self._on_job_stage, job, stage)
+
+        def on_done(result, error):
+            wx.CallAfter(self._on_job_done, job, component_id, result, error, on_success)
+
+        job = DownloadJob(target, on_stage=on_stage, on_done=on_done)
+        self._job = job
+        for button in self._job_buttons:
+            button.Disable()
+        self.progress_gauge.SetValue(0)
+        self.progress_label.SetLabel("starting...")
+        job.start()
+
+    def _finish_job(self):
+        self._job = None
+        if not self:
+            return
+        for button in self._job_buttons:
+            button.Enable()
+        self.progress_gauge.SetValue(0)
+        self.progress_label.SetLabel("")
+
+    def _on_job_stage(self, job, stage):
+        if not self or job is not self._job:
+            return
+        self.progress_gauge.SetValue(STAGES.index(stage))
+        self.progress_label.SetLabel(f"{stage}...")
+
+    def _on_job_done(self, job, component_id, result, error, on_success):
+        if not self or job is not self._job:
+            return
+        self._finish_job()
+        if isinstance(error, ComponentLookupError):
+            wx.MessageBox(
+                f"Failed to get component uuid for {component_id}\nThe component # is probably wrong. Check a possible typo and that the component exists on easyEDA"
+            )
+        elif error is not None:
+            wx.MessageBox(
+                f"Failed to download {component_id}\nError: {type(error).__name__}: {error}",
+                "JLC2KiCad Error",
+                wx.OK | wx.ICON_ERROR,
+            )
+        else:
+            on_success(result)
 
     def OnDownload(self, event):
         component_id = self.text_entry.GetValue()
@@ -182,25 +472,121 @@ class MyCustomDialog(wx.Dialog):
             wx.MessageBox("Type part number, e.g. C326215")
             return
         board: pcbnew.BOARD = pcbnew.GetBoard()
+        out_dir = os.path.join(os.path.dirname(board.GetFileName()), OUTPUT_FOLDER)
+        refresh = self.refresh_checkbox.GetValue()
+        defer_models = self.defer_models_checkbox.GetValue()
+
+        def target(progress):
+            return fetch_part(component_id, out_dir, True, True, refresh, progress, defer_models)
+
+        def on_success(result):
+            self.libpath, self.component_name = result
+            wx.MessageBox(f"Footprint " + self.component_name + " downloaded to project library " + self.libpath)
+
+        self._start_job(component_id, target, on_success)
+
+    def OnBatch(self, event):
+        board: pcbnew.BOARD = pcbnew.GetBoard()
+        board_dir = os.path.dirname(board.GetFileName())
+        if not board_dir:
+            wx.MessageBox("Save the board first, batch download writes to the project library folder")
+            return
+        batch_dialog = BatchDownloadDialog(self, os.path.join(board_dir, OUTPUT_FOLDER), self.text_entry.GetValue(), self.refresh_checkbox.GetValue())
+        batch_dialog.Center()
+        batch_dialog.ShowModal()
+        batch_dialog.Destroy()
+
+    def OnSyncBoard(self, event):
+        board: pcbnew.BOARD = pcbnew.GetBoard()
         board_dir = os.path.dirname(board.GetFileName())
-        self.libpath, self.component_name = download_part(component_id, os.path.join(board_dir, OUTPUT_FOLDER), True, True)
-        wx.MessageBox(f"Footprint " + self.component_name + " downloaded to project library " + self.libpath)
+        if not board_dir:
+            wx.MessageBox("Save the board first, sync writes to the project library folder")
+            return
+        sync_dialog = SyncBoardDialog(self, board, os.path.join(board_dir, OUTPUT_FOLDER), self.refresh_checkbox.GetValue())
+        sync_dialog.Center()
+        sync_dialog.ShowModal()
+        sync_dialog.Destroy()
+
+    def OnStats(self, event):
+        stats_dialog = StatsDialog(self)
+        stats_dialog.Center()
+        stats_dialog.ShowModal()
+        stats_dialog.Destroy()
 
     def OnPlaceFootprint(self, event):
-        component_id = self.text_entry.GetValue()
+        component_id = self.text_entry.GetValue().strip()
         if not component_id:
             wx.MessageBox("Type part number, e.g. C326215")
             return
-        out_dir =  os.path.join(tempfile.mkdtemp())
-        self.libpath, self.component_name = download_part(component_id, out_dir)
+        key = (component_id, self.refresh_checkbox.GetValue())
+        if self._use_prefetched(key):
+            return
+        if self._prefetch_job is not None and self._prefetch_key == key:
+            # Wait for the running prefetch instead of starting the same download again, now that
+            # the user waits for it, ahead of batch and board sync downloads
+            self._job = self._prefetch_job
+            self._job.set_priority(PRIORITY_INTERACTIVE)
+            for button in self._job_buttons:
+                button.Disable()
+            self.progress_label.SetLabel(f"{self._job.stage or 'starting'}...")
+            return
+        self._cancel_prefetch()
+
+        defer_models = self.defer_models_checkbox.GetValue()
+
+        def target(progress):
+            return render_footprint(component_id, key[1], progress, defer_models)
+
+        def on_success(result):
+            _prefetched_parts[key] = result
+            self._end_with_footprint(result)
+
+        self._start_job(component_id, target, on_success)
+
+    def _end_with_footprint(self, result):
+        self.component_name, self.footprint_text = result
+        self._stop_prefetch_timer()
+        self._stop_search_timer()
+        self._cancel_prefetch()
         self.EndModal(wx.ID_OK)
 
+    def _cancel_job(self):
+        if self._job is self._prefetch_job:
+            self._prefetch_job = None
+            self._prefetch_key = None
+        self._job.cancel()
+        self._finish_job()
+
     def OnCancel(self, event):
+        if self._job is not None:
+            # Stop the running download but keep the dialog open
+            self._cancel_job()
+            return
+        self._stop_prefetch_timer()
+        self._stop_search_timer()
+        self._cancel_prefetch()
         self.EndModal(wx.ID_CANCEL)
 
+    def OnClose(self, event):
+        if self._job is not None:
+            self._cancel_job()
+        self._stop_prefetch_timer()
+        self._stop_search_timer()
+        self._cancel_prefetch()
+        self.EndModal(wx.ID_CANCEL)
+
+    def _on_latest_version(self, latest_version):
+        # The dialog may be gone by the time the background check answers
+        if not self:
+            return
+        self.core_version_label.SetLabel(_core_version_text(latest_version))
+        self.Layout()
+
     def OnUpdateCoreLibrary(self, event):
         current_version = get_core_version()
-        latest_version = get_latest_core_version()
+        # Answered from the cache filled by the check started with the dialog, never waits for PyPI.
+        # "" when the version isn't known yet, so install_or_upgrade_core doesn't ask PyPI either.
+        latest_version = cached_latest_core_version() or ""
         if current_version and latest_version and current_version == latest_version:
             wx.MessageBox(
                 f"JLC2KiCad library is already up to date (v{current_version}).",
@@ -209,210 +595,364 @@ class MyCustomDialog(wx.Dialog):
             )
             return
 
-        if install_or_upgrade_core(prompt_reason="update"):
+        if install_or_upgrade_core(prompt_reason="update", latest_version=latest_version):
             new_version = get_core_version()
             self.core_version_label.SetLabel(_core_version_text())
             self.Layout()
 
-            global helper, create_footprint, create_symbol
-            helper = None
-            create_footprint = None
-            create_symbol = None
+            unload_core_library()
             if current_version != new_version:
                 self.EndModal(wx.ID_CANCEL)
 
     def OnHelp(self, event):
-        wx.MessageBox("Test button download footprint to temporary folder and copies to clipboard, press Ctrl+V to paste.\nDownloading to project uses JLC2KiCad_lib library folder in the project path", "Help", wx.OK | wx.ICON_INFORMATION)
+        wx.MessageBox("Test button download footprint to temporary folder and copies to clipboard, press Ctrl+V to paste.\nDownloading to project uses JLC2KiCad_lib library folder in the project path\nBatch downloads a pasted list or a BOM CSV/XLSX column of part numbers to the project library\nSync board fetches the parts named in the footprints' LCSC fields that are missing from the project library", "Help", wx.OK | wx.ICON_INFORMATION)
+
+
+class PartListDownloadDialog(wx.Dialog):
+    # Downloads a list of parts into the project library with run_batch on a worker thread and shows
+    # each part's result in parts_list. Subclasses build parts_list and their options, add the shared
+    # rows with _add_progress and _add_buttons, and start a download with _start.
+    STATUS_COLUMN = 1
+    DONE_VERB = "downloaded"
+    THREAD_NAME = "jlc-batch"
+
+    def __init__(self, parent, title, out_dir):
+        super(PartListDownloadDialog, self).__init__(parent, title=title, style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.out_dir = out_dir
+        self._cancel_event = threading.Event()
+        self._worker = None
+        self._close_requested = False
+        self._rows = {}
+        self._failed = 0
+
+    def _add_jobs_entry(self, options_row):
+        options_row.Add(wx.StaticText(self, label="Parallel downloads:"), 0, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 6)
+        self.jobs_entry = wx.SpinCtrl(self, min=1, max=MAX_JOBS, initial=DEFAULT_JOBS)
+        options_row.Add(self.jobs_entry, 0, wx.ALIGN_CENTER_VERTICAL)
+
+    def _add_progress(self, sizer):
+        self.gauge = wx.Gauge(self, range=1)
+        sizer.Add(self.gauge, 0, wx.LEFT | wx.RIGHT | wx.EXPAND, 10)
+        self.status_label = wx.StaticText(self, label="")
+        sizer.Add(self.status_label, 0, wx.ALL | wx.EXPAND, 10)
+
+    def _add_buttons(self, sizer, start_label):
+        button_row = wx.BoxSizer(wx.HORIZONTAL)
+        button_row.AddStretchSpacer(1)
+        self.start_button = wx.Button(self, wx.ID_ANY, start_label)
+        self.close_button = wx.Button(self, wx.ID_CANCEL, "Close")
+        button_row.Add(self.start_button, 0, wx.LEFT, 6)
+        button_row.Add(self.close_button, 0, wx.LEFT, 6)
+        sizer.Add(button_row, 0, wx.ALL | wx.EXPAND, 10)
 
+        self.Bind(wx.EVT_BUTTON, self.OnStart, id=self.start_button.GetId())
+        self.Bind(wx.EVT_BUTTON, self.OnClose, id=wx.ID_CANCEL)
+        self.Bind(wx.EVT_CLOSE, self.OnClose)
 
-def download_part(component_id, out_dir, get_symbol=False, skip_existing=False):
-    logging.info(f"creating library for component {component_id}")
-    data = json.loads(
-        requests.get(
-            f"https://easyeda.com/api/products/{component_id}/svgs",
-            headers={"User-Agent": helper.get_user_agent()},
-        ).content.decode()
-    )
+    def OnStart(self, event):
+        raise NotImplementedError
 
-    if not data["success"]:
-        wx.MessageBox(
-            f"Failed to get component uuid for {component_id}\nThe component # is probably wrong. Check a possible typo and that the component exists on easyEDA"
-        )
-        return "", ""
-    
-    footprint_component_uuid = data["result"][-1]["component_uuid"]
-    footprint_name, datasheet_link = create_footprint(
-        footprint_component_uuid=footprint_component_uuid,
-        component_id=component_id,
-        footprint_lib=FOOTPRINT_LIB,
-        output_dir=out_dir,
-        model_base_variable="",
-        model_dir="packages3d",
-        skip_existing=skip_existing,
-        models="STEP",
-    )
+    def _skip_existing(self, component_id):
+        return True
+
+    def _set_running(self, running):
+        # Enables or disables the subclass's options while a download runs
+        pass
+
+    def _start(self, component_ids, refresh):
+        # Rows of component_ids must be in _rows
+        self._failed = 0
+        self.gauge.SetRange(len(component_ids))
+        self.gauge.SetValue(0)
+        self.status_label.SetLabel(f"0 / {len(component_ids)}")
+        for component_id in component_ids:
+            self.parts_list.SetItem(self._rows[component_id], self.STATUS_COLUMN, "queued")
+        self.start_button.Disable()
+        self._set_running(True)
+        self.close_button.SetLabel("Stop")
+
+        self._cancel_event.clear()
+        self._worker = threading.Thread(target=self._run, args=(component_ids, self.jobs_entry.GetValue(), refresh), name=self.THREAD_NAME, daemon=True)
+        self._worker.start()
+
+    def _run(self, component_ids, jobs, refresh):
+        def download(component_id):
+            with job_context(self._cancel_event, priority=PRIORITY_BATCH):
+                return fetch_part(component_id, self.out_dir, get_symbol=True, skip_existing=self._skip_existing(component_id), refresh=refresh)
+
+        def on_progress(done, total, result):
+            wx.CallAfter(self._on_part_done, done, total, result)
+
+        with batched_symbol_writes(self.out_dir):
+            results = run_batch(component_ids, download, jobs=jobs, on_progress=on_progress, cancel_event=self._cancel_event)
+        wx.CallAfter(self._on_batch_done, results)
+
+    def _on_part_done(self, done, total, result):
+        if not self:
+            return
+        row = self._rows[result.component_id]
+        self.parts_list.SetItem(row, self.STATUS_COLUMN, "ok" if result.ok else "failed")
+        self.parts_list.SetItem(row, self.STATUS_COLUMN + 1, result.component_name if result.ok else result.error)
+        if not result.ok:
+            self._failed += 1
+        self.gauge.SetValue(done)
+        self.status_label.SetLabel(f"{done} / {total}, {self._failed} failed")
+
+    def _on_batch_done(self, results):
+        if not self:
+            return
+        self._worker = None
+        if self._close_requested:
+            self.EndModal(wx.ID_CANCEL)
+            return
+        ok = sum(1 for r in results if r.ok)
+        self.status_label.SetLabel(f"Done: {ok} {self.DONE_VERB}, {len(results) - ok} failed, library {self.out_dir}")
+        self._set_running(False)
+        self.close_button.SetLabel("Close")
+
+    def OnClose(self, event):
+        if self._worker is not None:
+            # Running parts stop at their next download chunk, queued ones are skipped
+            self._close_requested = True
+            self._cancel_event.set()
+            self.close_button.Disable()
+            self.status_label.SetLabel("Stopping...")
+            return
+        self.EndModal(wx.ID_CANCEL)
+
+
+class BatchDownloadDialog(PartListDownloadDialog):
+    def __init__(self, parent, out_dir, initial_text="", refresh=False):
+        super(BatchDownloadDialog, self).__init__(parent, "Batch download to project library", out_dir)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(wx.StaticText(self, label="Paste part numbers (any separator) or load a BOM:"), 0, wx.ALL, 10)
+        self.parts_entry = wx.TextCtrl(self, value=initial_text, style=wx.TE_MULTILINE, size=(460, 120))
+        sizer.Add(self.parts_entry, 1, wx.LEFT | wx.RIGHT | wx.EXPAND, 10)
+
+        options_row = wx.BoxSizer(wx.HORIZONTAL)
+        self.load_bom_button = wx.Button(self, wx.ID_ANY, "Load BOM...")
+        options_row.Add(self.load_bom_button, 0, wx.ALIGN_CENTER_VERTICAL)
+        self.refresh_checkbox = wx.CheckBox(self, label="Force refresh")
+        self.refresh_checkbox.SetValue(refresh)
+        options_row.Add(self.refresh_checkbox, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 10)
+        options_row.AddStretchSpacer(1)
+        self._add_jobs_entry(options_row)
+        sizer.Add(options_row, 0, wx.ALL | wx.EXPAND, 10)
+
+        self._add_progress(sizer)
+
+        self.parts_list = wx.ListCtrl(self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(460, 180))
+        self.parts_list.InsertColumn(0, "Part", width=90)
+        self.parts_list.InsertColumn(1, "Status", width=70)
+        self.parts_list.InsertColumn(2, "Footprint / error", width=290)
+        sizer.Add(self.parts_list, 1, wx.LEFT | wx.RIGHT | wx.EXPAND, 10)
+
+        self._add_buttons(sizer, "Download all")
+        self.SetSizer(sizer)
+        self.Fit()
+
+        self.Bind(wx.EVT_BUTTON, self.OnLoadBom, id=self.load_bom_button.GetId())
+
+    def OnLoadBom(self, event):
+        with wx.FileDialog(self, "Open BOM", wildcard="BOM files (*.csv;*.xlsx)|*.csv;*.xlsx|All files (*.*)|*.*",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as file_dialog:
+            if file_dialog.ShowModal() != wx.ID_OK:
+                return
+            path = file_dialog.GetPath()
+        try:
+            parts = read_bom_part_numbers(path)
+        except Exception as exc:
+            wx.MessageBox(f"Failed to read BOM {path}\nError: {type(exc).__name__}: {exc}", "JLC2KiCad Error", wx.OK | wx.ICON_ERROR, parent=self)
+            return
+        if not parts:
+            wx.MessageBox(f"No LCSC part numbers found in {path}", "JLC2KiCad", wx.OK | wx.ICON_INFORMATION, parent=self)
+            return
+        self.parts_entry.SetValue("\n".join(parts))
+
+    def OnStart(self, event):
+        parts = parse_part_numbers(self.parts_entry.GetValue())
+        if not parts:
+            wx.MessageBox("Type part numbers, e.g. C326215", parent=self)
+            return
+
+        self.parts_list.DeleteAllItems()
+        for row, part in enumerate(parts):
+            self.parts_list.InsertItem(row, part)
+        self._rows = {part: row for row, part in enumerate(parts)}
+        self._start(parts, self.refresh_checkbox.GetValue())
+
+    def _set_running(self, running):
+        self.start_button.Enable(not running)
+        self.load_bom_button.Enable(not running)
+
+
+class SyncBoardDialog(PartListDownloadDialog):
+    # Fetches the parts named in the board's LCSC fields that are missing or incomplete in the project library
+    STATUS_COLUMN = 2
+    DONE_VERB = "fetched"
+    THREAD_NAME = "jlc-sync"
+
+    def __init__(self, parent, board, out_dir, refresh=False):
+        super(SyncBoardDialog, self).__init__(parent, "Sync board parts to project library", out_dir)
+
+        parts, self._unassigned = scan_board(board)
+        self._plan = plan_sync(parts, project_library_index(out_dir))
+        self._rows = {part.component_id: row for row, part in enumerate(self._plan)}
+        # Missing parts keep whatever the library already has, the others are regenerated
+        self._missing = {part.component_id for part in self._plan if part.status == STATUS_MISSING}
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        self.summary_label = wx.StaticText(self, label="")
+        sizer.Add(self.summary_label, 0, wx.ALL | wx.EXPAND, 10)
+
+        self.parts_list = wx.ListCtrl(self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(560, 260))
+        self.parts_list.InsertColumn(0, "Part", width=90)
+        self.parts_list.InsertColumn(1, "References", width=150)
+        self.parts_list.InsertColumn(2, "Status", width=70)
+        self.parts_list.InsertColumn(3, "Detail", width=240)
+        for row, part in enumerate(self._plan):
+            self.parts_list.InsertItem(row, part.component_id)
+            self.parts_list.SetItem(row, 1, ", ".join(part.references))
+            self.parts_list.SetItem(row, 2, part.status)
+            self.parts_list.SetItem(row, 3, part.reason)
+        sizer.Add(self.parts_list, 1, wx.LEFT | wx.RIGHT | wx.EXPAND, 10)
+
+        options_row = wx.BoxSizer(wx.HORIZONTAL)
+        self.refresh_checkbox = wx.CheckBox(self, label="Re-fetch parts already in the library")
+        self.refresh_checkbox.SetValue(refresh)
+        options_row.Add(self.refresh_checkbox, 0, wx.ALIGN_CENTER_VERTICAL)
+        options_row.AddStretchSpacer(1)
+        self._add_jobs_entry(options_row)
+        sizer.Add(options_row, 0, wx.ALL | wx.EXPAND, 10)
+
+        self._add_progress(sizer)
+        self._add_buttons(sizer, "Fetch")
+        self.SetSizer(sizer)
+        self.Fit()
 
-    if get_symbol:
-        symbol_component_uuid = [i["component_uuid"] for i in data["result"][:-1]]
-        create_symbol(
-            symbol_component_uuid=symbol_component_uuid,
-            footprint_name=footprint_name.replace(FOOTPRINT_LIB, FOOTPRINT_LIB_NICK) #link footprint according to the nickname
-                .replace(".pretty", ""),  # see https://github.com/TousstNicolas/JLC2KiCad_lib/issues/47
-            datasheet_link=datasheet_link,
-            library_name=SYMBOL_LIB,
-            symbol_path=SYMBOL_LIB_DIR,
-            output_dir=out_dir,
-            component_id=component_id,
-            skip_existing=skip_existing,
+        self.Bind(wx.EVT_CHECKBOX, self.OnRefreshChanged, id=self.refresh_checkbox.GetId())
+        self._update_summary()
+
+    def _parts_to_fetch(self):
+        if self.refresh_checkbox.GetValue():
+            return list(self._plan)
+        return [part for part in self._plan if part.status != STATUS_PRESENT]
+
+    def _update_summary(self):
+        counts = {}
+        for part in self._plan:
+            counts[part.status] = counts.get(part.status, 0) + 1
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        self.summary_label.SetLabel(
+            f"{len(self._plan)} distinct parts on the board ({summary or 'none'}), "
+            f"{len(self._unassigned)} footprints without an LCSC field"
         )
-    libpath = os.path.join(out_dir, FOOTPRINT_LIB)
-    component_name = footprint_name.replace(FOOTPRINT_LIB + ":", "")
-    
-    return libpath, component_name
-
-class JLC2KiCad_GUI(pcbnew.ActionPlugin):
-    def defaults(self):
-        self.name = "Download JLC part"
-        self.category = "Modify PCB"
-        self.description = "A description of the plugin and what it does"
-        self.show_toolbar_button = True
- 
-        self.pcbnew_icon_support = hasattr(self, "show_toolbar_button")
-        self.icon_file_name = os.path.join(os.path.dirname(__file__), "icon.png")
-        
-        self._pcbnew_frame = None
-        self.kicad_build_version = pcbnew.GetBuildVersion()
+        to_fetch = len(self._parts_to_fetch())
+        self.start_button.SetLabel(f"Fetch {to_fetch} parts")
+        self.start_button.Enable(to_fetch > 0 and self._worker is None)
+        self.Layout()
 
-        self.InitLogger()
-        self.logger = logging.getLogger(__name__)
+    def OnRefreshChanged(self, event):
+        self._update_summary()
 
-    def IsVersion(self, version):
-        for v in version:
-            if v in self.kicad_build_version:
-                return True
-        return False
+    def OnStart(self, event):
+        self._start([part.component_id for part in self._parts_to_fetch()], self.refresh_checkbox.GetValue())
 
-    def PasteFootprint(self):
-        # Footprint string pasting based on KiBuzzard https://github.com/gregdavill/KiBuzzard/blob/main/KiBuzzard/plugin.py
-        if self.IsVersion(['5.99','6.', '7.']):
-            if self._pcbnew_frame is not None:
-                # Set focus to main window and attempt to execute a Paste operation 
-                wx.MilliSleep(100)
-                try:
-                    # Send ESC key before Ctrl+V to close other activities
-                    esc_evt = wx.KeyEvent(wx.wxEVT_CHAR_HOOK)
-                    esc_evt.SetKeyCode(wx.WXK_ESCAPE)
-                    self.logger.log(logging.INFO, "Using wx.KeyEvent for ESC key")
-
-                    wnd = [i for i in self._pcbnew_frame.Children if i.ClassName == 'wxWindow'][0]
-                    self.logger.log(logging.INFO, "Injecting ESC event: {} into window: {}".format(esc_evt, wnd))
-                    wx.PostEvent(wnd, esc_evt)
-
-                    # Simulate pressing Ctrl+V to paste footprint
-                    v_evt = wx.KeyEvent(wx.wxEVT_CHAR_HOOK)
-                    v_evt.SetKeyCode(ord('V'))
-                    v_evt.SetControlDown(True)
-                    self.logger.log(logging.INFO, "Using wx.KeyEvent for Ctrl+V")
-
-                    self.logger.log(logging.INFO, "Injecting Ctrl+V event: {} into window: {}".format(v_evt, wnd))
-                    wx.PostEvent(wnd, v_evt)
-
-                except:
-                    # Likely on Linux with old wx python support :(
-                    self.logger.log(logging.INFO, "Using wx.UIActionSimulator for paste")
-                    keyinput = wx.UIActionSimulator()
-                    self._pcbnew_frame.Raise()
-                    self._pcbnew_frame.SetFocus()
-                    wx.MilliSleep(100)
-                    wx.Yield()
-                    # Press and release CTRL + V
-                    keyinput.Char(ord("V"), wx.MOD_CONTROL)
-                    wx.MilliSleep(100)
-            else:
-                self.logger.log(logging.ERROR, "No pcbnew window found")
+    def _skip_existing(self, component_id):
+        return component_id in self._missing
+
+    def _set_running(self, running):
+        self.refresh_checkbox.Enable(not running)
+
+
+class StatsDialog(wx.Dialog):
+    # Per-stage percentiles and cache hit rates over the recent records in stats.jsonl
+    def __init__(self, parent):
+        super(StatsDialog, self).__init__(parent, title="Download performance", style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        self.summary_label = wx.StaticText(self, label="")
+        sizer.Add(self.summary_label, 0, wx.ALL | wx.EXPAND, 10)
+
+        self.stages_list = wx.ListCtrl(self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(560, 220))
+        for column, (label, width) in enumerate(
+            (("Run", 70), ("Stage", 80), ("Count", 55), ("p50 ms", 70), ("p90 ms", 70), ("p99 ms", 70), ("Max ms", 70), ("Avg KB", 65))
+        ):
+            self.stages_list.InsertColumn(column, label, width=width)
+        sizer.Add(self.stages_list, 1, wx.LEFT | wx.RIGHT | wx.EXPAND, 10)
+
+        self.caches_label = wx.StaticText(self, label="")
+        sizer.Add(self.caches_label, 0, wx.ALL | wx.EXPAND, 10)
+
+        button_row = wx.BoxSizer(wx.HORIZONTAL)
+        button_row.Add(wx.StaticText(self, label=perf_stats.stats_path()), 1, wx.ALIGN_CENTER_VERTICAL)
+        clear_button = wx.Button(self, wx.ID_ANY, "Clear")
+        close_button = wx.Button(self, wx.ID_CANCEL, "Close")
+        button_row.Add(clear_button, 0, wx.LEFT, 6)
+        button_row.Add(close_button, 0, wx.LEFT, 6)
+        sizer.Add(button_row, 0, wx.ALL | wx.EXPAND, 10)
+
+        self.SetSizer(sizer)
+        self.Fit()
+
+        self.Bind(wx.EVT_BUTTON, self.OnClear, id=clear_button.GetId())
+        self._load()
+
+    def _load(self):
+        records = perf_stats.read_records()
+        stages, caches = perf_stats.summarize(records)
+        self.stages_list.DeleteAllItems()
+        # Pipeline order first, then whatever other stages were recorded
+        order = {stage: index for index, stage in enumerate(("total",) + STAGES + ("dialog", "clipboard", "paste"))}
+        for row, ((kind, stage), summary) in enumerate(sorted(stages.items(), key=lambda item: (item[0][0], order.get(item[0][1], len(order)), item[0][1]))):
+            self.stages_list.InsertItem(row, kind)
+            self.stages_list.SetItem(row, 1, stage)
+            self.stages_list.SetItem(row, 2, str(summary["count"]))
+            for column, key in enumerate(("p50", "p90", "p99", "max"), start=3):
+                self.stages_list.SetItem(row, column, f"{summary[key]:.0f}")
+            self.stages_list.SetItem(row, 7, f"{summary['bytes'] / 1024:.1f}")
+
+        if not get_setting("perf_stats_enabled"):
+            self.summary_label.SetLabel("Recording is off (perf_stats_enabled in config.json)")
         else:
-            self.logger.log(logging.ERROR, "Version check failed \"{}\" not in version list".format(self.kicad_build_version))
+            failed = sum(1 for record in records if record.get("status") != "ok")
+            self.summary_label.SetLabel(f"{len(records)} recent runs, {failed} failed or cancelled")
+        rates = [f"{name}: {hits}/{total} hits ({100 * hits / total:.0f}%)" for name, (hits, total) in sorted(caches.items())]
+        self.caches_label.SetLabel("Caches - " + ", ".join(rates) if rates else "No cache lookups recorded")
+        self.Layout()
+
+    def OnClear(self, event):
+        perf_stats.clear_records()
+        self._load()
+
+
+class PartDownloadPlugin:
+    # Does the actual work of the action plugin, created on the first click of the toolbar button
+    def __init__(self):
+        self.kicad_build_version = pcbnew.GetBuildVersion()
+        self.placement = PlacementEngine(self.kicad_build_version)
+
+        setup_logging()
+        self.logger = logging.getLogger(__name__)
 
     def Run(self):
         board: pcbnew.BOARD = pcbnew.GetBoard()
         if not _check_gui_core_library():
             return
+        # Resolved while the editor still has the focus, placement reuses it
+        self.placement.editor_frame()
 
-        if self._pcbnew_frame is None:
-            try:
-                self._pcbnew_frame = [x for x in wx.GetTopLevelWindows() if ('pcbnew' in x.GetTitle().lower() and not 'python' in x.GetTitle().lower()) or ('pcb editor' in x.GetTitle().lower())]
-                if len(self._pcbnew_frame) == 1:
-                    self._pcbnew_frame = self._pcbnew_frame[0]
-                else:
-                    self._pcbnew_frame = None
-            except:
-                pass
-
-        part_download_dialog = MyCustomDialog(None, "Download JLCPCB part footprint and symbol", "JLCPCB part no:", "JLCPCB part download plugin")
-        part_download_dialog.Center()
+        with perf_stats.recording("open"), perf_stats.stage("dialog"):
+            part_download_dialog = MyCustomDialog(None, "Download JLCPCB part footprint and symbol", "JLCPCB part no:", "JLCPCB part download plugin")
+            part_download_dialog.Center()
         
         dialog_answer = part_download_dialog.ShowModal()
+        component_name = part_download_dialog.component_name
+        footprint_text = part_download_dialog.footprint_text
+        part_download_dialog.Destroy()
         if dialog_answer == wx.ID_CANCEL:
             return
         if dialog_answer == wx.ID_OK:
-            libpath = part_download_dialog.libpath
-            component_name = part_download_dialog.component_name
             if component_name:
-                self.logger.log(logging.DEBUG, "Loading footprint into the clipboard")
-                clipboard = wx.Clipboard.Get()
-                if clipboard.Open():
-                    # read file
-                    with open(os.path.join(libpath, component_name + ".kicad_mod"), 'r') as file:
-                        footprint_string = file.read()
-                    clipboard.SetData(wx.TextDataObject(footprint_string))
-                    clipboard.Close()
-                else:
-                    self.logger.log(logging.DEBUG, "Clipboard error")
-                    fp : pcbnew.FOOTPRINT = pcbnew.FootprintLoad(libpath, component_name)
-                    fp.SetPosition(pcbnew.VECTOR2I(0, 0))
-                    board.Add(fp)
-                    pcbnew.Refresh()
-                    wx.MessageBox("Clipboard couldn't be opened. Footprint " + component_name + " was placed in top left corner of the canvas")
-
-                self.PasteFootprint()
-
-
-
-    def InitLogger(self):
-        root = logging.getLogger()
-        root.setLevel(logging.DEBUG)
-
-        # Log to stderr
-        handler1 = logging.StreamHandler(sys.stderr)
-        handler1.setLevel(logging.DEBUG)
-
-
-        log_path = os.path.dirname(__file__)
-        log_file = os.path.join(log_path, "JLC2KiCad_gui.log")
-
-        # and to our error file
-        # Check logging file permissions, if fails, move log file to tmp folder
-        handler2 = None
-        try:
-            handler2 = logging.FileHandler(log_file)
-        except PermissionError:
-            log_path = os.path.join(tempfile.mkdtemp()) 
-            try: # Use try/except here because python 2.7 doesn't support exist_ok
-                os.makedirs(log_path)
-
-            except:
-                pass
-            log_file = os.path.join(log_path, "JLC2KiCad_gui.log")
-            handler2 = logging.FileHandler(log_file)
-
-            # Also move config file
-            self.config_file = os.path.join(log_path, 'config.json')
-        
-        handler2.setLevel(logging.DEBUG)
-        formatter = logging.Formatter(
-            "%(asctime)s %(name)s %(lineno)d:%(message)s", datefmt="%m-%d %H:%M:%S"
-        )
-        handler1.setFormatter(formatter)
-        handler2.setFormatter(formatter)
-        root.addHandler(handler1)
-        root.addHandler(handler2)
+                self.placement.place(board, component_name, footprint_text)
@@ -1,9 +1,21 @@
 from __future__ import print_function
+import os
 import traceback
 
 
-try:
-    from .JLC2KiCad_gui import JLC2KiCad_GUI
-    JLC2KiCad_GUI().register()
-except Exception as exc:
-    traceback.print_exc()
+if os.environ.get("JLC2KICAD_GENERATION_WORKER"):
+    # A headless generation worker (generation_pool.py), even when started with KiCad's interpreter
+    pcbnew = None
+else:
+    try:
+        import pcbnew
+    except ImportError:
+        # Imported outside KiCad, e.g. by the command line interface (__main__.py)
+        pcbnew = None
+
+if pcbnew is not None:
+    try:
+        from .action_plugin import JLC2KiCad_GUI
+        JLC2KiCad_GUI().register()
+    except Exception as exc:
+        traceback.print_exc()
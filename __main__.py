@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# Command line interface, runs the download pipeline without KiCad:
+#
+#   python -m JLC2KiCad_lib_gui fetch C326215 C2040 --out DIR [--jobs N] [--json]
+#   python -m JLC2KiCad_lib_gui fetch --bom bom.csv --out DIR
+#
+# Exits with 0 when every part was downloaded, 1 when some failed and 2 on usage errors.
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+
+from .batch_download import DEFAULT_JOBS, MAX_JOBS, parse_part_numbers, read_bom_part_numbers, run_batch
+from .generation_pool import get_generation_pool
+from .http_client import job_context
+from .part_pipeline import OUTPUT_FOLDER, batched_symbol_writes, fetch_part, load_core_library
+from .request_scheduler import PRIORITY_BATCH
+
+
+def _part_numbers(args):
+    parts = parse_part_numbers(" ".join(args.parts))
+    if args.bom:
+        column = int(args.column) if args.column and args.column.isdigit() else args.column
+        parts += [part for part in read_bom_part_numbers(args.bom, column) if part not in parts]
+    return parts
+
+
+def _fetch(args):
+    try:
+        parts = _part_numbers(args)
+    except (OSError, ValueError) as exc:
+        print(f"error: can't read {args.bom}: {exc}", file=sys.stderr)
+        return 2
+    if not parts:
+        print("error: no LCSC part numbers given", file=sys.stderr)
+        return 2
+
+    try:
+        load_core_library()
+    except ModuleNotFoundError:
+        print("error: JLC2KiCadLib is not installed, run: python -m pip install JLC2KiCadLib", file=sys.stderr)
+        return 2
+
+    pool = get_generation_pool()
+    if pool is not None:
+        pool.warm_up(args.jobs)
+
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    cancel_event = threading.Event()
+
+    def download(component_id):
+        with job_context(cancel_event, priority=PRIORITY_BATCH):
+            return fetch_part(component_id, out_dir, get_symbol=not args.no_symbol, skip_existing=not args.force, refresh=args.refresh)
+
+    def on_progress(done, total, result):
+        if not args.json:
+            print(f"[{done}/{total}] {result.component_id} {'ok' if result.ok else 'failed'}", file=sys.stderr)
+
+    try:
+        with batched_symbol_writes(out_dir):
+            results = run_batch(parts, download, jobs=args.jobs, on_progress=on_progress, cancel_event=cancel_event)
+    except KeyboardInterrupt:
+        cancel_event.set()
+        print("cancelled", file=sys.stderr)
+        return 1
+
+    if args.json:
+        json.dump(
+            [{"component_id": r.component_id, "ok": r.ok, "footprint": r.component_name, "error": r.error} for r in results],
+            sys.stdout,
+            indent=2,
+        )
+        print()
+    else:
+        for result in results:
+            print(f"{result.component_id}\t{'ok' if result.ok else 'failed'}\t{result.component_name or result.error}")
+        failed = sum(1 for result in results if not result.ok)
+        print(f"{len(results) - failed} of {len(results)} parts downloaded to {out_dir}", file=sys.stderr)
+    return 0 if all(result.ok for result in results) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m JLC2KiCad_lib_gui", description="Download JLCPCB/LCSC parts to a KiCad library")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser("fetch", help="download footprints, symbols and 3D models")
+    fetch.add_argument("parts", nargs="*", help="LCSC part numbers, e.g. C326215")
+    fetch.add_argument("--bom", default=None, help="read part numbers from a CSV or XLSX BOM")
+    fetch.add_argument("--column", default=None, help="BOM column name or index, detected when omitted")
+    fetch.add_argument("--out", default=OUTPUT_FOLDER, help=f"library folder (default: ./{OUTPUT_FOLDER})")
+    fetch.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"parallel downloads, at most {MAX_JOBS}")
+    fetch.add_argument("--no-symbol", action="store_true", help="skip the symbol library")
+    fetch.add_argument("--refresh", action="store_true", help="ignore the cached part lookup")
+    fetch.add_argument("--force", action="store_true", help="download parts already complete in the library")
+    fetch.add_argument("--json", action="store_true", help="print the results as JSON")
+    fetch.add_argument("-v", "--verbose", action="store_true", help="log to stderr")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr, format="%(levelname)s %(name)s: %(message)s")
+    return _fetch(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
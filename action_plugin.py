@@ -0,0 +1,24 @@
+import os
+
+import pcbnew
+
+
+class JLC2KiCad_GUI(pcbnew.ActionPlugin):
+    # Registered at KiCad startup, so keep this module free of heavy imports.
+    # The dialog, requests, JLC2KiCadLib and logging are loaded on the first Run().
+    def defaults(self):
+        self.name = "Download JLC part"
+        self.category = "Modify PCB"
+        self.description = "A description of the plugin and what it does"
+        self.show_toolbar_button = True
+
+        self.pcbnew_icon_support = hasattr(self, "show_toolbar_button")
+        self.icon_file_name = os.path.join(os.path.dirname(__file__), "icon.png")
+
+        self._plugin = None
+
+    def Run(self):
+        if self._plugin is None:
+            from .JLC2KiCad_gui import PartDownloadPlugin
+            self._plugin = PartDownloadPlugin()
+        self._plugin.Run()
@@ -0,0 +1,170 @@
+import collections
+import csv
+import logging
+import os
+import re
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_JOBS = 6
+MAX_JOBS = 16
+
+PART_NUMBER_RE = re.compile(r"\bC\d+\b")
+# Header names used for the LCSC column by JLCPCB, KiCad BOM exporters and common BOM plugins
+BOM_COLUMN_HINTS = ("lcsc", "jlc", "supplier part", "part number", "part #")
+
+_XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+BatchResult = collections.namedtuple("BatchResult", "component_id ok component_name error")
+
+
+def parse_part_numbers(text):
+    # Keep the first occurrence of each C-number, in the order given
+    parts = []
+    seen = set()
+    for match in PART_NUMBER_RE.finditer(text or ""):
+        part = match.group(0)
+        if part not in seen:
+            seen.add(part)
+            parts.append(part)
+    return parts
+
+
+def _read_csv_rows(path):
+    with open(path, "r", newline="", encoding="utf-8-sig", errors="replace") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        return [row for row in csv.reader(file, dialect)]
+
+
+def _xlsx_column_index(cell_ref):
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - ord("A") + 1)
+    return index - 1
+
+
+def _read_xlsx_rows(path):
+    # Minimal reader for the first worksheet, so no spreadsheet package is needed in KiCad's Python
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = []
+        if "xl/sharedStrings.xml" in archive.namelist():
+            root = ET.fromstring(archive.read("xl/sharedStrings.xml"))
+            for item in root.iter(f"{_XLSX_NS}si"):
+                shared_strings.append("".join(t.text or "" for t in item.iter(f"{_XLSX_NS}t")))
+
+        sheets = sorted(n for n in archive.namelist() if n.startswith("xl/worksheets/sheet") and n.endswith(".xml"))
+        if not sheets:
+            return []
+        root = ET.fromstring(archive.read(sheets[0]))
+
+    rows = []
+    for row in root.iter(f"{_XLSX_NS}row"):
+        values = {}
+        for cell in row.iter(f"{_XLSX_NS}c"):
+            cell_type = cell.get("t")
+            if cell_type == "inlineStr":
+                text = "".join(t.text or "" for t in cell.iter(f"{_XLSX_NS}t"))
+            else:
+                value = cell.find(f"{_XLSX_NS}v")
+                text = value.text if value is not None and value.text else ""
+                if cell_type == "s" and text:
+                    text = shared_strings[int(text)]
+            values[_xlsx_column_index(cell.get("r", ""))] = text
+        if values:
+            rows.append([values.get(i, "") for i in range(max(values) + 1)])
+    return rows
+
+
+def read_bom_rows(path):
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm"):
+        return _read_xlsx_rows(path)
+    return _read_csv_rows(path)
+
+
+def _pick_part_column(rows):
+    header = [cell.strip().lower() for cell in rows[0]] if rows else []
+    for hint in BOM_COLUMN_HINTS:
+        for index, name in enumerate(header):
+            if hint in name:
+                return index
+
+    # No recognizable header, use the column holding most C-numbers
+    counts = collections.Counter()
+    for row in rows:
+        for index, cell in enumerate(row):
+            if PART_NUMBER_RE.search(cell or ""):
+                counts[index] += 1
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def read_bom_part_numbers(path, column=None):
+    rows = read_bom_rows(path)
+    if not rows:
+        return []
+
+    if column is None:
+        index = _pick_part_column(rows)
+    elif isinstance(column, int):
+        index = column
+    else:
+        header = [cell.strip().lower() for cell in rows[0]]
+        index = header.index(column.strip().lower()) if column.strip().lower() in header else None
+    if index is None:
+        return []
+
+    # A cell may hold several part numbers, e.g. "C25804, C25744"
+    return parse_part_numbers("\n".join(row[index] for row in rows if index < len(row)))
+
+
+def run_batch(component_ids, download, jobs=DEFAULT_JOBS, on_progress=None, cancel_event=None):
+    # download(component_id) returns (libpath, component_name) or raises
+    cancel_event = cancel_event or threading.Event()
+    jobs = max(1, min(int(jobs), MAX_JOBS))
+    total = len(component_ids)
+    results = []
+
+    def _run_one(component_id):
+        if cancel_event.is_set():
+            return BatchResult(component_id, False, "", "cancelled")
+        try:
+            _, component_name = download(component_id)
+        except Exception as exc:
+            if cancel_event.is_set():
+                return BatchResult(component_id, False, "", "cancelled")
+            logger.exception(f"batch download of {component_id} failed")
+            return BatchResult(component_id, False, "", f"{type(exc).__name__}: {exc}")
+        if not component_name:
+            return BatchResult(component_id, False, "", "no footprint created")
+        return BatchResult(component_id, True, component_name, "")
+
+    logger.info(f"batch download of {total} parts using {jobs} workers")
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="jlc-batch") as pool:
+        futures = [pool.submit(_run_one, component_id) for component_id in component_ids]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_progress:
+                    on_progress(len(results), total, result)
+        except BaseException:
+            # e.g. Ctrl+C on the command line: queued parts are dropped, running ones see the cancel event
+            cancel_event.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    order = {component_id: i for i, component_id in enumerate(component_ids)}
+    results.sort(key=lambda r: order.get(r.component_id, total))
+    return results
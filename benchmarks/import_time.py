@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# Measures what KiCad pays at plugin-scan time: imports the plugin package under
+# `python -X importtime` with stand-in pcbnew/wx modules and reports the cost.
+#
+#   python benchmarks/import_time.py [--budget-ms 20] [--runs 5]
+#
+# Exits non-zero when a module that should only load on the first Run() shows up
+# at import time, or when the median import time exceeds the budget.
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from sandbox import PACKAGE_NAME, prepare_sandbox
+
+
+# Loaded lazily on the first Run(), never at KiCad startup
+DEFERRED_MODULES = ("requests", "JLC2KiCadLib", "sqlite3", "tempfile", "logging.handlers")
+DEFERRED_PLUGIN_MODULES = ("JLC2KiCad_gui", "part_pipeline", "placement", "core_library_installer", "pip_job", "plugin_logging", "version_check", "http_client", "part_cache", "part_index")
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run_once(root, stubs, import_plugin=True):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([stubs, root])
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    code = "import pcbnew\n"
+    if import_plugin:
+        code += f"import {PACKAGE_NAME}\nassert len(pcbnew.registered) == 1, 'plugin did not register'\n"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"plugin import failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=20.0, help="fail if the median plugin import takes longer")
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="jlc_importtime_")
+    try:
+        stubs = prepare_sandbox(root)
+        # Modules the interpreter loads anyway (site hooks etc.) aren't charged to the plugin
+        baseline = _run_once(root, stubs, import_plugin=False)
+        runs = [_run_once(root, stubs) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    cumulative_ms = [run.get(PACKAGE_NAME, 0) / 1000 for run in runs]
+    median_ms = statistics.median(cumulative_ms)
+    last = runs[-1]
+    plugin_modules = sorted(
+        ((name, us) for name, us in last.items() if name.startswith(PACKAGE_NAME)),
+        key=lambda item: -item[1],
+    )
+
+    print(f"plugin import: median {median_ms:.2f} ms, min {min(cumulative_ms):.2f} ms over {args.runs} runs")
+    for name, us in plugin_modules:
+        print(f"  {us / 1000:8.2f} ms  {name}")
+
+    deferred = [name for name in DEFERRED_MODULES if name in last and name not in baseline]
+    deferred += [
+        f"{PACKAGE_NAME}.{name}" for name in DEFERRED_PLUGIN_MODULES if f"{PACKAGE_NAME}.{name}" in last
+    ]
+    failed = False
+    if deferred:
+        print(f"FAIL: imported at plugin-scan time: {', '.join(deferred)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: median import {median_ms:.2f} ms exceeds budget {args.budget_ms:.2f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# Records the easyeda responses of real parts for stub_server.py.
+#
+#   python benchmarks/record_fixtures.py C2040 C326215 ... [--out benchmarks/fixtures]
+#
+# Files are stored under the stand-in server's route layout, e.g.
+# fixtures/easyeda/api/products/C2040/svgs and fixtures/models/<bucket>/<uuid>.
+import argparse
+import json
+import os
+import sys
+
+import requests
+
+from stub_server import FIXTURES_DIR, ROUTES
+
+
+PUBLIC_URLS = {
+    "easyeda_url": "https://easyeda.com",
+    "easyeda_models_url": "https://modules.easyeda.com",
+    "pypi_url": "https://pypi.org",
+}
+MODEL_BUCKET = "qAxj6KHrDKw4blvCG8QJPs7Y"
+USER_AGENT = "JLC2KiCad_gui fixture recorder (https://github.com/dzid26/JLC2KiCad_lib_gui)"
+
+
+def _fixture_path(out_dir, endpoint, url_path):
+    return os.path.join(out_dir, ROUTES[endpoint], *url_path.strip("/").split("/"))
+
+
+def _record(session, out_dir, endpoint, url_path):
+    response = session.get(PUBLIC_URLS[endpoint] + url_path, timeout=(5, 60))
+    response.raise_for_status()
+    path = _fixture_path(out_dir, endpoint, url_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(response.content)
+    print(f"  {len(response.content):9d} B  {url_path}")
+    return response.content
+
+
+def record_part(session, out_dir, part):
+    svgs = json.loads(_record(session, out_dir, "easyeda_url", f"/api/products/{part}/svgs"))
+    if not svgs.get("success"):
+        print(f"  {part}: lookup failed, skipped")
+        return
+    for result in svgs["result"]:
+        component = json.loads(_record(session, out_dir, "easyeda_url", f"/api/components/{result['component_uuid']}"))
+        for line in component["result"]["dataStr"]["shape"]:
+            if line.startswith("SVGNODE~"):
+                model_uuid = json.loads(line.split("~", 1)[1])["attrs"]["uuid"]
+                _record(session, out_dir, "easyeda_models_url", f"/{MODEL_BUCKET}/{model_uuid}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record easyeda responses for the stand-in server")
+    parser.add_argument("parts", nargs="+", help="LCSC part numbers, e.g. C2040")
+    parser.add_argument("--out", default=FIXTURES_DIR)
+    args = parser.parse_args(argv)
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    for part in args.parts:
+        print(part)
+        record_part(session, args.out, part)
+    _record(session, args.out, "pypi_url", "/pypi/JLC2KiCadLib/json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# Runs the download pipeline headless against stub_server.py and reports latency and throughput.
+#
+#   python benchmarks/run_benchmarks.py [--latency-ms 80] [--bandwidth-kbps 4000] [--parts 100] [--jobs 6]
+#                                       [--scenario batch-cold ...] [--json out.json] [--baseline old.json]
+#
+# Each scenario runs in its own process with empty user data/cache folders, a sandboxed copy of
+# the plugin and stand-in pcbnew/wx modules. "warm" scenarios fetch the same parts once untimed
+# first, so the lookup cache and part store are populated. With --baseline the run fails when a
+# scenario got slower than --max-regression percent.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from sandbox import PACKAGE_NAME, STUB_WX_HEADLESS, prepare_sandbox
+from stub_server import FIXTURES_DIR, start_server
+
+
+SCENARIOS = ("single-cold", "single-warm", "batch-cold", "batch-warm")
+FIRST_PART_NUMBER = 100000
+
+
+def _server_counts(base_url):
+    import urllib.request
+
+    with urllib.request.urlopen(f"{base_url}/__counts", timeout=5) as response:
+        return json.loads(response.read().decode())
+
+
+def run_child(scenario, options):
+    # Runs inside the sandbox process, prints one JSON line with the results
+    import logging
+    import threading
+
+    logging.basicConfig(level=logging.ERROR)
+
+    plugin_config = __import__(f"{PACKAGE_NAME}.plugin_config", fromlist=["*"])
+    os.makedirs(os.path.dirname(plugin_config.config_path()), exist_ok=True)
+    with open(plugin_config.config_path(), "w") as file:
+        json.dump(options["config"], file)
+
+    pipeline = __import__(f"{PACKAGE_NAME}.part_pipeline", fromlist=["*"])
+    batch_download = __import__(f"{PACKAGE_NAME}.batch_download", fromlist=["*"])
+    http_client = __import__(f"{PACKAGE_NAME}.http_client", fromlist=["*"])
+    model_fetcher = __import__(f"{PACKAGE_NAME}.model_fetcher", fromlist=["*"])
+    perf_stats = __import__(f"{PACKAGE_NAME}.perf_stats", fromlist=["*"])
+    request_scheduler = __import__(f"{PACKAGE_NAME}.request_scheduler", fromlist=["*"])
+    pipeline.load_core_library()
+
+    batch = scenario.startswith("batch")
+    count = options["parts"] if batch else options["repeat"]
+    parts = [f"C{FIRST_PART_NUMBER + i}" for i in range(count)]
+    cancel_event = threading.Event()
+    work_dir = options["work_dir"]
+    defer_models = not batch and bool(plugin_config.get_setting("defer_3d_models"))
+
+    priority = request_scheduler.PRIORITY_BATCH if batch else request_scheduler.PRIORITY_INTERACTIVE
+
+    def fetch(component_id, out_dir, latencies):
+        started = time.perf_counter()
+        with http_client.job_context(cancel_event, priority=priority):
+            if batch:
+                result = pipeline.fetch_part(component_id, out_dir, get_symbol=True, skip_existing=True)
+            else:
+                result = pipeline.fetch_part(component_id, out_dir, defer_models=defer_models)
+        latencies.append((time.perf_counter() - started) * 1000)
+        return result
+
+    def run_pass(out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+        latencies = []
+        started = time.perf_counter()
+        if batch:
+            with pipeline.batched_symbol_writes(out_dir):
+                results = batch_download.run_batch(parts, lambda cid: fetch(cid, out_dir, latencies), jobs=options["jobs"])
+            failed = [r.component_id for r in results if not r.ok]
+        else:
+            failed = []
+            for component_id in parts:
+                try:
+                    # The clipboard path writes every part to a fresh temp folder
+                    fetch(component_id, tempfile.mkdtemp(dir=out_dir), latencies)
+                except Exception:
+                    failed.append(component_id)
+        return time.perf_counter() - started, latencies, failed
+
+    if scenario.endswith("warm"):
+        run_pass(os.path.join(work_dir, "prime"))
+        model_fetcher.get_model_fetcher().wait_idle(120)
+        open(perf_stats.stats_path(), "w").close()
+
+    before = _server_counts(options["server"])
+    wall, latencies, failed = run_pass(os.path.join(work_dir, "timed"))
+    idle_started = time.perf_counter()
+    model_fetcher.get_model_fetcher().wait_idle(120)
+    models_idle = time.perf_counter() - idle_started
+    after = _server_counts(options["server"])
+
+    stages, caches = perf_stats.summarize(perf_stats.read_records(limit=10 * count))
+    result = {
+        "scenario": scenario,
+        "parts": count,
+        "failed": failed,
+        "wall_s": wall,
+        "parts_per_s": len(latencies) / wall if wall else 0.0,
+        "latency_ms": {
+            "p50": perf_stats.percentile(latencies, 50),
+            "p90": perf_stats.percentile(latencies, 90),
+            "max": max(latencies) if latencies else 0.0,
+        },
+        "models_idle_s": models_idle,
+        "requests": {route: after.get(route, 0) - before.get(route, 0) for route in after},
+        "stages_p50_ms": {stage: summary["p50"] for (kind, stage), summary in stages.items() if kind == "download"},
+        "cache_hits": {name: f"{hits}/{total}" for name, (hits, total) in caches.items()},
+    }
+    print(json.dumps(result))
+
+
+def _run_scenario(scenario, args, server, root, stubs):
+    work_dir = tempfile.mkdtemp(prefix=f"{scenario}_", dir=root)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([stubs, root])
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    # Fresh user data/cache folders on every platform
+    for name in ("HOME", "XDG_DATA_HOME", "XDG_CACHE_HOME", "LOCALAPPDATA", "USERPROFILE"):
+        env[name] = work_dir
+    config = server.endpoint_config()
+    config.update(json.loads(args.config) if args.config else {})
+    options = {
+        "config": config,
+        "server": server.base_url,
+        "parts": args.parts,
+        "repeat": args.repeat,
+        "jobs": args.jobs,
+        "work_dir": work_dir,
+    }
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", scenario, "--child-options", json.dumps(options)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{scenario} failed:\n{result.stderr[-3000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _print_results(results):
+    print(f"{'scenario':<12} {'parts':>5} {'wall s':>8} {'parts/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'max ms':>8}  requests")
+    for result in results:
+        latency = result["latency_ms"]
+        requests_made = ", ".join(f"{route} {count}" for route, count in sorted(result["requests"].items()) if count)
+        print(
+            f"{result['scenario']:<12} {result['parts']:>5} {result['wall_s']:>8.2f} {result['parts_per_s']:>8.1f}"
+            f" {latency['p50']:>8.1f} {latency['p90']:>8.1f} {latency['max']:>8.1f}  {requests_made or '-'}"
+        )
+        if result["failed"]:
+            print(f"{'':<12} failed: {', '.join(result['failed'][:10])}")
+        stages = ", ".join(f"{stage} {ms:.1f}" for stage, ms in result["stages_p50_ms"].items())
+        caches = ", ".join(f"{name} {hits}" for name, hits in sorted(result["cache_hits"].items()))
+        print(f"{'':<12} stage p50 ms: {stages}; cache hits: {caches or '-'}")
+
+
+def _compare(results, baseline_path, max_regression):
+    with open(baseline_path) as file:
+        baseline = {result["scenario"]: result for result in json.load(file)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(result["scenario"])
+        if not old:
+            continue
+        for label, new_value, old_value in (
+            ("p50 latency", result["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            ("wall time", result["wall_s"], old["wall_s"]),
+        ):
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            print(f"{result['scenario']:<12} {label}: {old_value:.2f} -> {new_value:.2f} ({change:+.1f}%)")
+            if change > max_regression:
+                regressions.append(f"{result['scenario']} {label} {change:+.1f}%")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless download benchmarks against a local stand-in server")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="run only these, may be repeated")
+    parser.add_argument("--parts", type=int, default=100, help="parts per batch scenario")
+    parser.add_argument("--repeat", type=int, default=20, help="downloads per single-part scenario")
+    parser.add_argument("--jobs", type=int, default=6, help="parallel downloads in batch scenarios")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--bandwidth-kbps", type=float, default=4000.0, help="KiB/s per response, 0 is unlimited")
+    parser.add_argument("--model-kb", type=int, default=200, help="size of synthetic STEP models")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="stand-in server answers 429 beyond this many requests per second")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="recorded responses, synthetic parts are used otherwise")
+    parser.add_argument("--config", default=None, help="extra plugin settings as JSON, e.g. '{\"http_retries\": 0}'")
+    parser.add_argument("--json", dest="json_path", default=None, help="write the results to this file")
+    parser.add_argument("--baseline", default=None, help="results of an earlier --json run to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown in percent")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--child-options", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, json.loads(args.child_options))
+        return 0
+
+    server = start_server(
+        fixtures_dir=args.fixtures,
+        latency_ms=args.latency_ms,
+        bandwidth_kbps=args.bandwidth_kbps,
+        model_size=args.model_kb * 1024,
+        rate_limit=args.rate_limit,
+    )
+    print(f"stand-in server {server.base_url}: {args.latency_ms:.0f} ms latency, "
+          f"{args.bandwidth_kbps:.0f} KiB/s{' (unlimited)' if not args.bandwidth_kbps else ''}")
+    root = tempfile.mkdtemp(prefix="jlc_bench_")
+    try:
+        stubs = prepare_sandbox(root, stub_wx=STUB_WX_HEADLESS)
+        results = [_run_scenario(scenario, args, server, root, stubs) for scenario in args.scenario or SCENARIOS]
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+    _print_results(results)
+    if args.json_path:
+        settings = {key: getattr(args, key) for key in ("parts", "repeat", "jobs", "latency_ms", "bandwidth_kbps", "model_kb", "rate_limit")}
+        with open(args.json_path, "w") as file:
+            json.dump({"settings": settings, "python": sys.version.split()[0], "results": results}, file, indent=2)
+
+    failed = any(result["failed"] for result in results)
+    if args.baseline:
+        regressions = _compare(results, args.baseline, args.max_regression)
+        if regressions:
+            print(f"FAIL: slower than baseline: {'; '.join(regressions)}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
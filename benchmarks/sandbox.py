@@ -0,0 +1,92 @@
+# Helpers shared by the benchmarks: a copy of the plugin importable as a package,
+# next to stand-in pcbnew/wx modules so it runs headless without KiCad.
+import os
+import shutil
+
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "JLC2KiCad_lib_gui"
+
+# Just enough for the action plugin to register at scan time
+STUB_PCBNEW = """
+class ActionPlugin:
+    def __init__(self):
+        self.defaults()
+
+    def defaults(self):
+        pass
+
+    def register(self):
+        registered.append(self)
+
+
+registered = []
+
+
+def GetBuildVersion():
+    return "9.0.0"
+"""
+
+STUB_WX = """
+ID_OK = 5100
+"""
+
+# Lets the dialog module import: every wx attribute is a class that accepts anything
+STUB_WX_HEADLESS = """
+import sys
+import types
+
+
+class _Anything:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __or__(self, other):
+        return self
+
+    __ror__ = __or__
+
+
+class _WxModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        stub = type(name, (_Anything,), {})
+        setattr(self, name, stub)
+        return stub
+
+
+def CallAfter(callback, *args, **kwargs):
+    callback(*args, **kwargs)
+
+
+def MessageBox(message, *args, **kwargs):
+    print(f"[wx.MessageBox] {message}", file=sys.stderr)
+
+
+sys.modules[__name__].__class__ = _WxModule
+"""
+
+
+def prepare_sandbox(root, stub_wx=STUB_WX, stub_pcbnew=STUB_PCBNEW):
+    # Returns the stub folder, put it and root on PYTHONPATH to import PACKAGE_NAME
+    stubs = os.path.join(root, "stubs")
+    os.makedirs(stubs)
+    with open(os.path.join(stubs, "pcbnew.py"), "w") as file:
+        file.write(stub_pcbnew)
+    with open(os.path.join(stubs, "wx.py"), "w") as file:
+        file.write(stub_wx)
+
+    package = os.path.join(root, PACKAGE_NAME)
+    shutil.copytree(
+        PLUGIN_DIR,
+        package,
+        ignore=shutil.ignore_patterns(".git", "__pycache__", "benchmarks", "*.log"),
+    )
+    return stubs
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# Local stand-in for easyeda.com, modules.easyeda.com and pypi.org.
+#
+#   python benchmarks/stub_server.py [--port 8765] [--latency-ms 80] [--bandwidth-kbps 4000] [--rate-limit 10] [--fixtures DIR]
+#
+# Responses come from fixtures recorded with record_fixtures.py when present, otherwise a
+# synthetic part is generated for any part number, so the server works with no fixtures at all.
+# Every response is delayed by --latency-ms and sent at --bandwidth-kbps (0 = unlimited).
+# With --rate-limit, requests beyond that many per second get 429 with a Retry-After header.
+# The printed config.json snippet points the plugin at the server.
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Route prefix on the stand-in server for each endpoint setting of the plugin
+ROUTES = {
+    "easyeda_url": "easyeda",
+    "easyeda_models_url": "models",
+    "pypi_url": "pypi",
+}
+SEND_CHUNK_SIZE = 16 * 1024
+SYNTHETIC_MODEL_SIZE = 200 * 1024
+SYNTHETIC_CORE_VERSION = "0.0.0"
+
+SVGS_RE = re.compile(r"^/easyeda/api/products/(?P<part>[^/]+)/svgs$")
+COMPONENT_RE = re.compile(r"^/easyeda/api/components/(?P<uuid>[^/]+)$")
+MODEL_RE = re.compile(r"^/models/[^/]+/(?P<uuid>[^/]+)$")
+PYPI_RE = re.compile(r"^/pypi/pypi/(?P<package>[^/]+)/json$")
+
+
+def _pin(number, name, x, y):
+    fields = [""] * 26
+    fields[0] = "show"
+    fields[1] = "1"
+    fields[2] = str(number)
+    fields[3] = str(x)
+    fields[4] = str(y)
+    fields[5] = "180"
+    fields[6] = f"gge{number}"
+    fields[7] = "0"
+    fields[8] = f"M {x} {y} h 10"
+    fields[9] = "#880000^^1"
+    fields[13] = name
+    fields[16] = "7pt"
+    fields[17] = "end^^1"
+    fields[21] = str(number)
+    fields[24] = "7pt"
+    return "P~" + "~".join(fields)
+
+
+def synthetic_svgs(part):
+    return {
+        "success": True,
+        "result": [
+            {"component_uuid": f"sym-{part}"},
+            {"component_uuid": f"fp-{part}"},
+        ],
+    }
+
+
+def synthetic_component(uuid):
+    # A three pin SOT-23-like footprint with a STEP model, or a matching symbol
+    kind, _, part = uuid.partition("-")
+    head = {"x": 4000, "y": 3000, "c_para": {"pre": "U?", "link": f"https://example.invalid/{part}.pdf"}}
+    if kind == "fp":
+        shape = [
+            "PAD~RECT~3962~2962~23.6~39.4~1~~1~0~~0~gge1~0~~Y~0~~~",
+            "PAD~RECT~4038~2962~23.6~39.4~1~~2~0~~0~gge2~0~~Y~0~~~",
+            "PAD~RECT~4000~3038~23.6~39.4~1~~3~0~~0~gge3~0~~Y~0~~~",
+            "TRACK~0.6~3~~3940 2985 4060 2985 4060 3015 3940 3015 3940 2985~gge4~0",
+            "SVGNODE~" + json.dumps({"attrs": {"c_origin": "4000,3000", "uuid": f"model-{part}", "z": "0", "c_rotation": "0,0,0"}}),
+        ]
+        title = f"SYN-{part}"
+    else:
+        shape = [
+            "R~3970~2960~~~60~80~#880000~1~0~none~gge0~0",
+            _pin(1, "IN", 3960, 2980),
+            _pin(2, "GND", 3960, 3000),
+            _pin(3, "OUT", 3960, 3020),
+        ]
+        title = f"SYN_{part}"
+    return {
+        "success": True,
+        "result": {
+            "title": title,
+            "dataStr": {"head": head, "shape": shape},
+            "packageDetail": {"dataStr": {"head": {"c_para": {"pre": "U?"}}}},
+        },
+    }
+
+
+def synthetic_model(uuid, size=SYNTHETIC_MODEL_SIZE):
+    header = f"ISO-10303-21;\nHEADER;\nFILE_NAME('{uuid}.step');\nENDSEC;\nDATA;\n".encode()
+    body = b"#1=CARTESIAN_POINT('',(0.,0.,0.));\n" * ((size - len(header)) // 35 + 1)
+    return (header + body)[:size]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures_dir=FIXTURES_DIR, latency_ms=0.0, bandwidth_kbps=0.0, model_size=SYNTHETIC_MODEL_SIZE, rate_limit=0.0):
+        super().__init__(address, StubRequestHandler)
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.model_size = model_size
+        self.rate_limit = rate_limit
+        self.request_counts = {}
+        self._counts_lock = threading.Lock()
+        self._recent = []
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoint_config(self):
+        return {name: f"{self.base_url}/{prefix}" for name, prefix in ROUTES.items()}
+
+    def count(self, route):
+        with self._counts_lock:
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+    def counts(self):
+        with self._counts_lock:
+            return dict(self.request_counts)
+
+    def throttled(self):
+        # True when the request exceeds rate_limit requests within the last second
+        if not self.rate_limit:
+            return False
+        with self._counts_lock:
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            if len(self._recent) >= self.rate_limit:
+                self.request_counts["throttled"] = self.request_counts.get("throttled", 0) + 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def fixture(self, path):
+        if not self.fixtures_dir:
+            return None
+        file_path = os.path.normpath(os.path.join(self.fixtures_dir, path.lstrip("/")))
+        if not file_path.startswith(os.path.normpath(self.fixtures_dir) + os.sep) or not os.path.isfile(file_path):
+            return None
+        with open(file_path, "rb") as file:
+            return file.read()
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, Nagle plus delayed ACKs would add ~40 ms to every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/__counts":
+            # Requests served per route, used by run_benchmarks.py
+            self._send_json(self.server.counts())
+            return
+        if self.server.throttled():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        route, body, content_type = self._resolve(path)
+        self.server.count(route)
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if route == "pypi":
+            # Lets the plugin's version check revalidate its cached answer
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if route == "pypi":
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self._send_body(body)
+
+    def _send_json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _resolve(self, path):
+        recorded = self.server.fixture(path)
+        for route, pattern in (("svgs", SVGS_RE), ("component", COMPONENT_RE), ("model", MODEL_RE), ("pypi", PYPI_RE)):
+            match = pattern.match(path)
+            if not match:
+                continue
+            content_type = "application/octet-stream" if route == "model" else "application/json"
+            if recorded is not None:
+                return route, recorded, content_type
+            if route == "svgs":
+                return route, json.dumps(synthetic_svgs(match.group("part"))).encode(), content_type
+            if route == "component":
+                return route, json.dumps(synthetic_component(match.group("uuid"))).encode(), content_type
+            if route == "model":
+                return route, synthetic_model(match.group("uuid"), self.server.model_size), content_type
+            return route, json.dumps({"info": {"version": SYNTHETIC_CORE_VERSION}}).encode(), content_type
+        return "other", recorded, "application/octet-stream"
+
+    def _send_body(self, body):
+        rate = self.server.bandwidth_kbps * 1024
+        if not rate:
+            self.wfile.write(body)
+            return
+        started = time.monotonic()
+        for offset in range(0, len(body), SEND_CHUNK_SIZE):
+            chunk = body[offset:offset + SEND_CHUNK_SIZE]
+            self.wfile.write(chunk)
+            # Sleep until the bytes sent so far fit the bandwidth budget
+            delay = (offset + len(chunk)) / rate - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    # Serves on a daemon thread, port 0 picks a free port
+    server = StubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local easyeda/PyPI stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay before each response")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0.0, help="response bandwidth in KiB/s, 0 is unlimited")
+    parser.add_argument("--model-kb", type=int, default=SYNTHETIC_MODEL_SIZE // 1024, help="size of synthetic STEP models")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="answer 429 beyond this many requests per second, 0 is unlimited")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="recorded responses, see record_fixtures.py")
+    args = parser.parse_args(argv)
+
+    server = StubServer(
+        (args.host, args.port),
+        fixtures_dir=args.fixtures,
+        latency_ms=args.latency_ms,
+        bandwidth_kbps=args.bandwidth_kbps,
+        model_size=args.model_kb * 1024,
+        rate_limit=args.rate_limit,
+    )
+    print(f"serving on {server.base_url}, add to config.json:")
+    print(json.dumps(server.endpoint_config(), indent=2))
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
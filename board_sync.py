@@ -0,0 +1,74 @@
+import collections
+
+from .batch_download import PART_NUMBER_RE
+
+
+# Footprint field names that hold the LCSC part number, compared case-insensitively
+LCSC_FIELD_NAMES = (
+    "lcsc",
+    "lcsc part",
+    "lcsc part #",
+    "lcsc part number",
+    "lcsc#",
+    "jlc",
+    "jlc part",
+    "jlcpcb",
+    "jlcpcb part",
+    "jlcpcb part #",
+    "jlcpcb part number",
+    "supplier part",
+)
+
+STATUS_PRESENT = "present"
+STATUS_MISSING = "missing"
+STATUS_OUTDATED = "outdated"
+
+SyncPart = collections.namedtuple("SyncPart", "component_id references status reason")
+
+
+def footprint_fields(footprint):
+    try:
+        # KiCad 8 and newer
+        return {field.GetName(): field.GetText() for field in footprint.GetFields()}
+    except AttributeError:
+        # KiCad 6/7 keep user fields as footprint properties
+        return dict(footprint.GetProperties())
+
+
+def footprint_part_number(footprint):
+    for name, value in footprint_fields(footprint).items():
+        if name.strip().lower() in LCSC_FIELD_NAMES:
+            match = PART_NUMBER_RE.search(value or "")
+            if match:
+                return match.group(0)
+    return ""
+
+
+def scan_board(board):
+    # Returns ({component_id: [references]}, [references without a part number]), in board order
+    parts = collections.OrderedDict()
+    unassigned = []
+    for footprint in board.GetFootprints():
+        reference = footprint.GetReference()
+        component_id = footprint_part_number(footprint)
+        if component_id:
+            parts.setdefault(component_id, []).append(reference)
+        else:
+            unassigned.append(reference)
+    return parts, unassigned
+
+
+def plan_sync(parts, index):
+    # Compares the board's parts against the project library index
+    plan = []
+    for component_id, references in parts.items():
+        entry = index.lookup(component_id)
+        if not entry.symbol:
+            plan.append(SyncPart(component_id, references, STATUS_MISSING, "not in symbol library"))
+        elif not entry.footprint:
+            plan.append(SyncPart(component_id, references, STATUS_MISSING, "footprint file missing"))
+        elif entry.missing_models:
+            plan.append(SyncPart(component_id, references, STATUS_OUTDATED, f"3D model missing: {entry.missing_models[0]}"))
+        else:
+            plan.append(SyncPart(component_id, references, STATUS_PRESENT, ""))
+    return plan
@@ -1,9 +1,7 @@
-import json
 import os
 import shutil
-import subprocess
 import sys
-from urllib.request import urlopen
+import threading
 
 try:
     from importlib.metadata import PackageNotFoundError, version as package_version
@@ -14,7 +12,11 @@ except Exception:
 
 REPO_URL = "https://github.com/dzid26/JLC2KiCad_lib_gui"
 CORE_PACKAGE = "JLC2KiCadLib"
-PYPI_JSON_URL = f"https://pypi.org/pypi/{CORE_PACKAGE}/json"
+PYPI_URL = "https://pypi.org"
+PIP_POLL_INTERVAL = 0.1
+# Longest pip output line shown in the progress dialog and pip output shown when it failed
+PIP_LINE_CHARS = 100
+PIP_OUTPUT_CHARS = 1500
 
 
 def _show_message(message, title, style):
@@ -99,17 +101,62 @@ def get_core_version():
         return None
 
 
-def get_latest_core_version(timeout=4):
+def pypi_url():
     try:
-        with urlopen(PYPI_JSON_URL, timeout=timeout) as response:
-            payload = response.read().decode("utf-8")
-        data = json.loads(payload)
+        from .plugin_config import get_setting
+        return (get_setting("pypi_url") or PYPI_URL).rstrip("/")
     except Exception:
-        return None
-    return data.get("info", {}).get("version")
+        return PYPI_URL
+
+
+def _wheelhouse():
+    # (folder of wheels, whether PyPI is skipped), the folder is "" when none is configured
+    try:
+        from .plugin_config import get_setting
+        return os.path.expanduser(get_setting("core_wheelhouse") or ""), bool(get_setting("core_wheelhouse_only"))
+    except Exception:
+        return "", False
+
+
+def pip_install_command(python_exe):
+    cmd = [python_exe, "-m", "pip", "install", "--upgrade", "--progress-bar", "off", "--disable-pip-version-check", CORE_PACKAGE]
+    wheelhouse, wheelhouse_only = _wheelhouse()
+    if wheelhouse:
+        # Wheels in the folder are preferred over a download when they're as new as the index's
+        cmd += ["--find-links", wheelhouse]
+    if wheelhouse and wheelhouse_only:
+        cmd += ["--no-index"]
+    elif pypi_url() != PYPI_URL:
+        cmd += ["--index-url", f"{pypi_url()}/simple"]
+    return cmd
+
+
+def _run_pip(cmd):
+    # Runs pip in the background behind a progress dialog that shows its output line by line, so
+    # KiCad keeps painting. Returns the finished PipJob, its returncode is None when it was cancelled.
+    import wx
+    from .pip_job import PipJob
+
+    done = threading.Event()
+    job = PipJob(cmd, on_done=lambda returncode: done.set())
+    dialog = wx.ProgressDialog(
+        "JLC2KiCad",
+        "Starting pip...",
+        parent=None,
+        style=wx.PD_APP_MODAL | wx.PD_CAN_ABORT | wx.PD_ELAPSED_TIME,
+    )
+    try:
+        job.start()
+        while not done.wait(PIP_POLL_INTERVAL):
+            keep_going, _ = dialog.Pulse(job.last_line[:PIP_LINE_CHARS] or "Starting pip...")
+            if not keep_going and not job.cancelled:
+                job.cancel()
+    finally:
+        dialog.Destroy()
+    return job
 
 
-def install_or_upgrade_core(prompt_reason="update", prompt_user=True):
+def install_or_upgrade_core(prompt_reason="update", prompt_user=True, latest_version=None):
     try:
         import wx
     except Exception:
@@ -117,7 +164,9 @@ def install_or_upgrade_core(prompt_reason="update", prompt_user=True):
 
     current_version = get_core_version()
     current_version_label = current_version or "not installed"
-    latest_version = get_latest_core_version()
+    if latest_version is None and prompt_user and prompt_reason != "missing":
+        from .version_check import get_latest_core_version
+        latest_version = get_latest_core_version()
 
     if prompt_user:
         if prompt_reason == "missing":
@@ -149,14 +198,8 @@ def install_or_upgrade_core(prompt_reason="update", prompt_user=True):
         )
         return False
 
-    cmd = [python_exe, "-m", "pip", "install", "--upgrade", CORE_PACKAGE]
     try:
-        result = subprocess.run(
-            cmd,
-            check=False,
-            capture_output=True,
-            text=True,
-        )
+        result = _run_pip(pip_install_command(python_exe))
     except Exception as install_error:
         show_error(
             "Automatic install failed.\n"
@@ -165,6 +208,10 @@ def install_or_upgrade_core(prompt_reason="update", prompt_user=True):
         )
         return False
 
+    if result.returncode is None:
+        show_info("JLC2KiCad library install/update was cancelled.")
+        return False
+
     if result.returncode == 0:
         new_version = get_core_version() or current_version_label
         if prompt_reason == "missing":
@@ -182,11 +229,11 @@ def install_or_upgrade_core(prompt_reason="update", prompt_user=True):
                 )
         return True
 
-    stderr_tail = (result.stderr or "").strip()[-600:]
+    output_tail = "\n".join(result.output)[-PIP_OUTPUT_CHARS:]
     show_error(
         "Automatic install/update did not complete successfully.\n\n"
         f"pip exit code: {result.returncode}\n"
-        f"{stderr_tail}\n\n"
+        f"{output_tail}\n\n"
         f"Install manually using README.md or visit:\n{REPO_URL}"
     )
     return False
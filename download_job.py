@@ -0,0 +1,76 @@
+import logging
+import threading
+
+from .http_client import DownloadCancelled, is_model_url, job_context
+from .request_scheduler import PRIORITY_INTERACTIVE
+
+
+logger = logging.getLogger(__name__)
+
+
+STAGE_LOOKUP = "lookup"
+STAGE_FOOTPRINT = "footprint"
+STAGE_MODEL = "3D model"
+STAGE_SYMBOL = "symbol"
+STAGES = (STAGE_LOOKUP, STAGE_FOOTPRINT, STAGE_MODEL, STAGE_SYMBOL)
+
+
+class DownloadJob:
+    # Runs target(progress) on a worker thread.
+    # on_stage(stage) and on_done(result, error) are called from the worker thread,
+    # GUI callers wrap them with wx.CallAfter. on_done isn't called once the job was cancelled.
+
+    def __init__(self, target, on_stage=None, on_done=None, name="jlc-download", priority=PRIORITY_INTERACTIVE):
+        self.target = target
+        self.on_stage = on_stage
+        self.on_done = on_done
+        self.priority = priority
+        self.stage = None
+        self.result = None
+        self.error = None
+        self._cancel_event = threading.Event()
+        self._context = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def set_priority(self, priority):
+        # Requests the running job makes from now on are queued with this priority
+        self.priority = priority
+        if self._context is not None:
+            self._context.priority = priority
+
+    def _progress(self, stage):
+        if self.stage == stage or self.cancelled:
+            return
+        self.stage = stage
+        if self.on_stage:
+            self.on_stage(stage)
+
+    def _on_request(self, url):
+        if is_model_url(url):
+            self._progress(STAGE_MODEL)
+
+    def _run(self):
+        try:
+            with job_context(self._cancel_event, self._on_request, self.priority) as context:
+                self._context = context
+                context.priority = self.priority
+                self.result = self.target(self._progress)
+        except DownloadCancelled:
+            logger.info("download cancelled")
+            return
+        except Exception as exc:
+            logger.exception("download failed")
+            self.error = exc
+        if self.on_done and not self.cancelled:
+            self.on_done(self.result, self.error)
@@ -0,0 +1,279 @@
+# Runs JLC2KiCadLib's create_footprint/create_symbol in warm worker processes, so parsing the easyeda
+# shapes and writing the S-expressions scales with cores and doesn't hold the GIL of KiCad's interpreter.
+#
+# Workers run `python -m <package>.generation_pool` with the interpreter resolve_python_for_pip finds.
+# They talk JSON lines over stdin/stdout:
+#   worker -> {"ready": true}  or  {"ready": false, "error": "ModuleNotFoundError: ..."}
+#   parent -> {"id": 1, "kind": "footprint", "kwargs": {...}, "defer_models": true, "capture": false}
+#   worker -> {"id": 1, "ok": true, "result": [...], "model_urls": [...], "files": {path or symbol name: text}}
+#   worker -> {"id": 1, "ok": false, "error": "KeyError: 'shape'"}
+import atexit
+import contextlib
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+
+from .core_library_installer import resolve_python_for_pip
+from .http_client import DownloadCancelled, check_cancelled, deferred_model_downloads
+from .plugin_config import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+# Folder that holds the plugin package, put on the workers' PYTHONPATH
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Set in the workers' environment, the package __init__ then skips pcbnew and the plugin registration
+WORKER_ENV = "JLC2KICAD_GENERATION_WORKER"
+STARTUP_TIMEOUT = 30
+POLL_INTERVAL = 0.1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class GenerationError(Exception):
+    pass
+
+
+class WorkerUnavailable(Exception):
+    pass
+
+
+class GenerationWorker:
+    def __init__(self, python_exe):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_PARENT, env.get("PYTHONPATH")]))
+        env["PYTHONIOENCODING"] = "utf-8"
+        env[WORKER_ENV] = "1"
+        self.process = subprocess.Popen(
+            [python_exe, "-m", f"{__package__}.generation_pool"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            env=env,
+            cwd=PACKAGE_PARENT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self.ready = None
+        self._responses = queue.Queue()
+        self._next_id = 0
+        threading.Thread(target=self._read_stdout, name="jlc-generation-out", daemon=True).start()
+        threading.Thread(target=self._read_stderr, name="jlc-generation-err", daemon=True).start()
+
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            try:
+                self._responses.put(json.loads(line))
+            except ValueError:
+                logger.warning(f"generation worker {self.process.pid}: {line.rstrip()}")
+        # None marks the end of the stream, the worker exited
+        self._responses.put(None)
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            logger.info(f"generation worker {self.process.pid}: {line.rstrip()}")
+
+    @property
+    def alive(self):
+        return self.process.poll() is None and self.ready is not False
+
+    def _next_response(self, timeout=None):
+        response = self._responses.get(timeout=timeout)
+        if response is None:
+            self._responses.put(None)
+        return response
+
+    def wait_ready(self):
+        if self.ready is None:
+            try:
+                response = self._next_response(STARTUP_TIMEOUT)
+            except queue.Empty:
+                response = {"ready": False, "error": f"no answer within {STARTUP_TIMEOUT} s"}
+            response = response or {"ready": False, "error": f"exited with code {self.process.wait()}"}
+            self.ready = bool(response.get("ready"))
+            if not self.ready:
+                self.close()
+                raise WorkerUnavailable(response.get("error", "worker failed to start"))
+        return self.ready
+
+    def call(self, kind, kwargs, defer_models, capture):
+        self.wait_ready()
+        self._next_id += 1
+        request = {"id": self._next_id, "kind": kind, "kwargs": kwargs, "defer_models": defer_models, "capture": capture}
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except OSError as exc:
+            raise GenerationError(f"generation worker exited: {exc}")
+
+        while True:
+            try:
+                check_cancelled()
+                response = self._next_response(POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            except DownloadCancelled:
+                # The worker can't be interrupted mid-call, a fresh one is started for the next request
+                self.close()
+                raise
+            if response is None:
+                raise GenerationError(f"generation worker exited with code {self.process.wait()}")
+            if response.get("id") != request["id"]:
+                continue
+            if not response["ok"]:
+                raise GenerationError(response["error"])
+            return response["result"], response["model_urls"], response["files"]
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+class GenerationPool:
+    # Up to size workers, started on demand and kept running until close()
+    def __init__(self, python_exe, size):
+        self.python_exe = python_exe
+        self.size = size
+        self.broken = False
+        self._workers = []
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def warm_up(self, count=1):
+        # Starts workers ahead of the first request, they import JLC2KiCadLib in the background
+        with self._lock:
+            if self.broken:
+                return
+            started = [GenerationWorker(self.python_exe) for _ in range(min(count, self.size) - len(self._workers))]
+            self._workers.extend(started)
+        for worker in started:
+            self._idle.put(worker)
+
+    def _acquire(self):
+        while True:
+            try:
+                # LIFO hands out the most recently used, warmest worker
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = None
+            if worker is None:
+                with self._lock:
+                    if self.broken:
+                        raise WorkerUnavailable("generation workers failed to start")
+                    if len(self._workers) < self.size:
+                        worker = GenerationWorker(self.python_exe)
+                        self._workers.append(worker)
+            if worker is None:
+                check_cancelled()
+                try:
+                    worker = self._idle.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            if worker.alive:
+                return worker
+            self._discard(worker)
+
+    def _discard(self, worker):
+        worker.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def run(self, kind, kwargs, defer_models=False, capture=False):
+        # Returns (result, 3D model URLs collected with defer_models, footprints kept in memory with capture)
+        worker = self._acquire()
+        try:
+            return worker.call(kind, kwargs, defer_models, capture)
+        except WorkerUnavailable as exc:
+            logger.warning(f"generation workers unavailable, generating in process: {exc}")
+            self.broken = True
+            raise
+        finally:
+            if worker.alive:
+                self._idle.put(worker)
+            else:
+                self._discard(worker)
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+def get_generation_pool():
+    # None when generation runs in this process: generation_processes is 0, no separate Python
+    # interpreter was found, or the workers couldn't import JLC2KiCadLib
+    global _pool
+
+    size = int(get_setting("generation_processes") or 0)
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            python_exe = resolve_python_for_pip()
+            if not python_exe:
+                logger.warning("no Python interpreter found for generation workers, generating in process")
+                size = 0
+            _pool = GenerationPool(python_exe, size)
+            _pool.broken = not python_exe
+        return None if _pool.broken else _pool
+
+
+def close_generation_pool():
+    # Stops the workers, e.g. after JLC2KiCadLib was upgraded; the next request starts new ones
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_generation_pool)
+
+
+def _serve():
+    from . import part_pipeline
+
+    # Stray prints must not end up in the JSON stream
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+
+    def send(message):
+        protocol.write(message + "\n")
+        protocol.flush()
+
+    try:
+        part_pipeline.load_core_library()
+    except Exception as exc:
+        send(json.dumps({"ready": False, "error": f"{type(exc).__name__}: {exc}"}))
+        return 1
+    send(json.dumps({"ready": True}))
+    generators = {"footprint": part_pipeline.create_footprint, "symbol": part_pipeline.create_symbol}
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            with deferred_model_downloads() if request["defer_models"] else contextlib.nullcontext([]) as model_urls:
+                with part_pipeline.captured_output() if request["capture"] else contextlib.nullcontext({}) as files:
+                    result = generators[request["kind"]](**request["kwargs"])
+            response = json.dumps({"id": request["id"], "ok": True, "result": result, "model_urls": model_urls, "files": files})
+        except Exception as exc:
+            logger.exception(f"{request['kind']} generation failed")
+            response = json.dumps({"id": request["id"], "ok": False, "error": f"{type(exc).__name__}: {exc}"})
+        send(response)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr, format="%(levelname)s %(name)s: %(message)s")
+    sys.exit(_serve())
@@ -0,0 +1,318 @@
+import contextlib
+import logging
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import perf_stats
+from .plugin_config import DEFAULTS, get_setting
+from .request_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, get_scheduler, parse_retry_after
+
+
+logger = logging.getLogger(__name__)
+
+
+CHUNK_SIZE = 64 * 1024
+POOL_CONNECTIONS = 8
+POOL_MAXSIZE = 16
+RETRY_BACKOFF = 0.5
+RETRY_STATUS = (500, 502, 503, 504)
+FALLBACK_USER_AGENT = "JLC2KiCad_gui (https://github.com/dzid26/JLC2KiCad_lib_gui)"
+MODEL_URL_MARKERS = ("modules.easyeda.com", "3dmodel")
+ENDPOINT_SETTINGS = ("easyeda_url", "easyeda_models_url", "pypi_url")
+
+_job = threading.local()
+_session = None
+_session_lock = threading.Lock()
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class _JobContext:
+    def __init__(self, cancel_event, on_request, priority, shared_responses=None, parent=None):
+        self.cancel_event = cancel_event
+        self.on_request = on_request
+        self._priority = priority
+        # Contexts of job_runner() threads follow the priority of the job they belong to
+        self._parent = parent
+        self.deferred_model_urls = None
+        # Resolved URL -> future of its response, filled by prefetch()
+        self.shared_responses = shared_responses
+
+    @property
+    def priority(self):
+        return self._parent.priority if self._parent is not None else self._priority
+
+    @priority.setter
+    def priority(self, priority):
+        self._priority = priority
+
+
+def endpoint(name):
+    return (get_setting(name) or DEFAULTS[name]).rstrip("/")
+
+
+def resolve_url(url):
+    # Maps the public base URLs, including the ones hardcoded in JLC2KiCadLib, to the configured ones
+    for name in ENDPOINT_SETTINGS:
+        default = DEFAULTS[name]
+        if url.startswith(default + "/"):
+            return endpoint(name) + url[len(default):]
+    return url
+
+
+def is_model_url(url):
+    return any(marker in url for marker in MODEL_URL_MARKERS) or url.startswith(endpoint("easyeda_models_url") + "/")
+
+
+@contextlib.contextmanager
+def job_context(cancel_event=None, on_request=None, priority=PRIORITY_INTERACTIVE):
+    # Requests made on this thread, including the ones inside JLC2KiCadLib, observe the cancel event
+    # and are queued for easyeda with this priority
+    previous = getattr(_job, "context", None)
+    _job.context = _JobContext(cancel_event or threading.Event(), on_request, priority)
+    try:
+        yield _job.context
+    finally:
+        _job.context = previous
+
+
+@contextlib.contextmanager
+def deferred_model_downloads():
+    # While active, 3D model requests on this thread get an empty 200 response and their URLs are
+    # collected instead, so JLC2KiCadLib adds the model reference without waiting for the download.
+    # The caller downloads the collected URLs later and replaces the empty placeholder files.
+    context = getattr(_job, "context", None)
+    if context is None:
+        with job_context(priority=PRIORITY_BACKGROUND):
+            with deferred_model_downloads() as urls:
+                yield urls
+        return
+
+    previous = context.deferred_model_urls
+    context.deferred_model_urls = []
+    try:
+        yield context.deferred_model_urls
+    finally:
+        context.deferred_model_urls = previous
+
+
+def job_runner(fn):
+    # Wraps fn to run on another thread as part of the calling thread's job: with its cancel event,
+    # priority and shared responses, and with its timing record
+    context = getattr(_job, "context", None)
+    record = perf_stats.current_record()
+
+    def run(*args, **kwargs):
+        previous = getattr(_job, "context", None)
+        if context is not None:
+            _job.context = _JobContext(context.cancel_event, context.on_request, context.priority, context.shared_responses, context)
+        try:
+            with perf_stats.attached(record):
+                return fn(*args, **kwargs)
+        finally:
+            _job.context = previous
+
+    return run
+
+
+@contextlib.contextmanager
+def shared_responses():
+    # While active, get() of a URL passed to prefetch() waits for that response instead of sending
+    # the request again, on this thread and on threads started with job_runner()
+    context = getattr(_job, "context", None)
+    if context is None:
+        with job_context():
+            with shared_responses() as responses:
+                yield responses
+        return
+
+    previous = context.shared_responses
+    context.shared_responses = {}
+    try:
+        yield context.shared_responses
+    finally:
+        context.shared_responses = previous
+
+
+def prefetch(url, executor):
+    # Starts a GET of url on executor inside shared_responses(), does nothing outside it
+    context = getattr(_job, "context", None)
+    if context is None or context.shared_responses is None:
+        return
+    url = resolve_url(url)
+    if url not in context.shared_responses:
+        context.shared_responses[url] = executor.submit(job_runner(_get), url)
+
+
+def _placeholder_response(url):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = b""
+    return response
+
+
+def user_agent():
+    try:
+        from JLC2KiCadLib import helper
+        return helper.get_user_agent()
+    except Exception:
+        return FALLBACK_USER_AGENT
+
+
+def _create_session():
+    retry = Retry(
+        total=int(get_setting("http_retries")),
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = user_agent()
+    return session
+
+
+def get_session():
+    # One pooled keep-alive session for the whole plugin, so each host pays the TLS handshake once
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+def reset_session():
+    # Drops pooled connections, e.g. after JLC2KiCadLib got installed and the User-Agent changed
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def default_timeout():
+    return (float(get_setting("http_connect_timeout")), float(get_setting("http_read_timeout")))
+
+
+def check_cancelled():
+    context = getattr(_job, "context", None)
+    if context is not None and context.cancel_event.is_set():
+        raise DownloadCancelled("download cancelled")
+
+
+def easyeda_scheduler(url):
+    # Requests to the easyeda API and model bucket share a per-host scheduler, other hosts aren't limited
+    if not any(url.startswith(endpoint(name) + "/") for name in ("easyeda_url", "easyeda_models_url")):
+        return None
+    return get_scheduler(urlsplit(url).netloc)
+
+
+def _send(session, url, context, kwargs):
+    # Streams the body so a cancel stops large downloads (e.g. STEP models) part way through.
+    # A 429 response pauses the host and the request is sent again, up to http_retries times.
+    scheduler = easyeda_scheduler(url)
+    cancel_event = context.cancel_event if context is not None else None
+    retries = int(get_setting("http_retries"))
+    for attempt in range(retries + 1):
+        if scheduler is not None and not scheduler.acquire(context.priority if context is not None else PRIORITY_BACKGROUND, cancel_event):
+            raise DownloadCancelled("download cancelled")
+        outcome = {}
+        try:
+            started = time.monotonic()
+            response = session.get(url, stream=True, **kwargs)
+            outcome = {
+                "status": response.status_code,
+                "latency": time.monotonic() - started,
+                "retry_after": parse_retry_after(response.headers.get("Retry-After")) if response.status_code in (429, 503) else None,
+            }
+            if response.status_code == 429 and attempt < retries:
+                response.close()
+                continue
+            chunks = []
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise DownloadCancelled("download cancelled")
+                    chunks.append(chunk)
+                    perf_stats.add_bytes(len(chunk))
+            finally:
+                response.close()
+            response._content = b"".join(chunks)
+            logger.debug("GET %s -> %d, %d bytes in %.0f ms", url, response.status_code, len(response._content), (time.monotonic() - started) * 1000)
+            return response
+        except requests.RequestException:
+            outcome = {"failed": True}
+            raise
+        finally:
+            if scheduler is not None:
+                scheduler.release(**outcome)
+
+
+def get(url, **kwargs):
+    url = resolve_url(url)
+    context = getattr(_job, "context", None)
+    if context is not None and context.shared_responses:
+        prefetched = context.shared_responses.get(url)
+        if prefetched is not None:
+            return prefetched.result()
+    return _get(url, **kwargs)
+
+
+def _get(url, **kwargs):
+    kwargs.setdefault("timeout", default_timeout())
+    url = resolve_url(url)
+    session = get_session()
+    context = getattr(_job, "context", None)
+    if context is not None:
+        check_cancelled()
+        if context.deferred_model_urls is not None and is_model_url(url):
+            context.deferred_model_urls.append(url)
+            return _placeholder_response(url)
+        if context.on_request:
+            context.on_request(url)
+
+    # Model downloads happen inside create_footprint, they get their own stage in the timing record
+    with perf_stats.stage("3D model") if is_model_url(url) else contextlib.nullcontext():
+        return _send(session, url, context, kwargs)
+
+
+class _CoreRequestsProxy:
+    # Stands in for the requests module inside JLC2KiCadLib so its traffic goes through get()
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def get(self, url, *args, **kwargs):
+        if args:
+            kwargs.setdefault("params", args[0])
+        return get(url, **kwargs)
+
+
+_core_requests_proxy = _CoreRequestsProxy()
+
+
+def install_core_hooks():
+    hooked = []
+    for name, module in list(sys.modules.items()):
+        if name.split(".")[0] != "JLC2KiCadLib" or module is None:
+            continue
+        if getattr(module, "requests", None) is requests:
+            module.requests = _core_requests_proxy
+            hooked.append(name)
+    if hooked:
+        logger.debug(f"routing JLC2KiCadLib requests through plugin client: {', '.join(hooked)}")
+    return hooked
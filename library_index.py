@@ -0,0 +1,148 @@
+import collections
+import os
+import re
+import threading
+
+from .batch_download import PART_NUMBER_RE
+from .symbol_library_writer import SYMBOL_START_RE
+
+
+FOOTPRINT_EXT = ".kicad_mod"
+
+# What the project library holds for one part. footprint and symbol are "" when absent,
+# models are the model paths the footprint refers to and missing_models the ones not on disk.
+LibraryEntry = collections.namedtuple("LibraryEntry", "component_id footprint symbol models missing_models")
+
+_PROPERTY_RE = re.compile(r'\(property "([^"]+)" "([^"]*)"')
+_TAGS_RE = re.compile(r'^\s*\(tags "([^"]*)"\)', re.MULTILINE)
+_MODEL_RE = re.compile(r'\(model\s+(?:"([^"]+)"|(\S+))')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_symbol_library(path):
+    # Maps the LCSC property of each symbol in a .kicad_sym file to (symbol name, footprint name)
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            content = file.read()
+    except FileNotFoundError:
+        return {}
+    symbols = {}
+    matches = list(SYMBOL_START_RE.finditer(content))
+    ends = [match.start() for match in matches[1:]] + [len(content)]
+    for match, end in zip(matches, ends):
+        properties = dict(_PROPERTY_RE.findall(content[match.start():end]))
+        if properties.get("LCSC"):
+            footprint = properties.get("Footprint", "").split(":", 1)[-1]
+            symbols[properties["LCSC"]] = (match.group(1), footprint)
+    return symbols
+
+
+def read_footprint(path):
+    # Returns (component_id from the tags JLC2KiCadLib writes, [model paths])
+    with open(path, "r", encoding="utf-8") as file:
+        content = file.read()
+    component_id = ""
+    tags = _TAGS_RE.search(content)
+    if tags:
+        parts = PART_NUMBER_RE.findall(tags.group(1))
+        component_id = parts[-1] if parts else ""
+    models = [quoted or bare for quoted, bare in _MODEL_RE.findall(content)]
+    return component_id, models
+
+
+class ProjectLibraryIndex:
+    # component_id -> footprint, symbol and 3D models of one project library, built from the
+    # footprint folder and the symbol library. Every lookup compares the mtime and size of the
+    # symbol library, the footprint folder and the part's footprint file, and re-reads only
+    # what changed, so lookups of unchanged parts cost a few stat calls.
+
+    def __init__(self, footprint_dir, symbol_file):
+        self.footprint_dir = footprint_dir
+        self.symbol_file = symbol_file
+        self._lock = threading.Lock()
+        self._symbol_stamp = None
+        self._symbols = {}
+        self._dir_stamp = None
+        # footprint name -> (stamp, component_id, models)
+        self._footprints = {}
+        self._by_part = {}
+
+    def _refresh(self):
+        stamp = _stamp(self.symbol_file)
+        if stamp != self._symbol_stamp:
+            self._symbols = read_symbol_library(self.symbol_file) if stamp else {}
+            self._symbol_stamp = stamp
+        stamp = _stamp(self.footprint_dir)
+        if stamp != self._dir_stamp:
+            self._scan_footprints()
+            self._dir_stamp = stamp
+
+    def _scan_footprints(self):
+        try:
+            names = [name[: -len(FOOTPRINT_EXT)] for name in os.listdir(self.footprint_dir) if name.endswith(FOOTPRINT_EXT)]
+        except OSError:
+            names = []
+        footprints = {}
+        for name in names:
+            info = self._footprint(name)
+            if info is not None:
+                footprints[name] = info
+        self._footprints = footprints
+        self._by_part = {info[1]: name for name, info in footprints.items() if info[1]}
+
+    def _footprint(self, name):
+        path = os.path.join(self.footprint_dir, name + FOOTPRINT_EXT)
+        stamp = _stamp(path)
+        cached = self._footprints.get(name)
+        if stamp is None:
+            self._footprints.pop(name, None)
+            return None
+        if cached is not None and cached[0] == stamp:
+            return cached
+        try:
+            component_id, models = read_footprint(path)
+        except (OSError, UnicodeDecodeError):
+            return None
+        info = (stamp, component_id, models)
+        self._footprints[name] = info
+        if component_id:
+            self._by_part[component_id] = name
+        return info
+
+    def _model_missing(self, model):
+        if "$" in model:
+            # Resolved by KiCad through a path variable, can't be checked here
+            return False
+        path = model if os.path.isabs(model) else os.path.join(self.footprint_dir, model)
+        stamp = _stamp(path)
+        return stamp is None or stamp[1] == 0
+
+    def lookup(self, component_id):
+        with self._lock:
+            self._refresh()
+            symbol_name, footprint_name = self._symbols.get(component_id, ("", ""))
+            footprint_name = footprint_name or self._by_part.get(component_id, "")
+            info = self._footprint(footprint_name) if footprint_name else None
+        if info is None:
+            return LibraryEntry(component_id, "", symbol_name, [], [])
+        models = info[2]
+        return LibraryEntry(component_id, footprint_name, symbol_name, models, [m for m in models if self._model_missing(m)])
+
+
+def get_library_index(footprint_dir, symbol_file):
+    key = (os.path.abspath(footprint_dir), os.path.abspath(symbol_file))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ProjectLibraryIndex(*key)
+        return index
@@ -0,0 +1,165 @@
+import heapq
+import logging
+import os
+import queue
+import threading
+import time
+
+from . import http_client
+
+
+logger = logging.getLogger(__name__)
+
+
+# Delay before each retry of a failed model download, the model is given up after the last one
+RETRY_DELAYS = (10, 60, 300)
+
+STATE_QUEUED = "queued"
+STATE_DOWNLOADING = "downloading"
+STATE_DONE = "done"
+STATE_RETRY = "retry"
+STATE_FAILED = "failed"
+
+_model_fetcher = None
+_model_fetcher_lock = threading.Lock()
+
+
+def save_model(url, path):
+    response = http_client.get(url)
+    response.raise_for_status()
+    if not response.content:
+        raise ValueError("empty model file")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".part"
+    with open(partial, "wb") as file:
+        file.write(response.content)
+    os.replace(partial, path)
+
+
+class ModelFetcher:
+    # Downloads deferred 3D models on a background thread. Failed downloads are retried
+    # with increasing delays and kept in a failed list that can be re-queued with retry_failed().
+
+    def __init__(self, retry_delays=RETRY_DELAYS):
+        self.retry_delays = retry_delays
+        self._queue = queue.Queue()
+        self._retries = []
+        self._states = {}
+        self._attempts = {}
+        self._urls = {}
+        self._on_saved = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add_listener(self, callback):
+        # callback(path, state) is called from the worker thread
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def enqueue(self, url, path, on_saved=None):
+        # on_saved(path) is called from the worker thread once the model is on disk
+        with self._lock:
+            if on_saved is not None:
+                self._on_saved.setdefault(path, []).append(on_saved)
+            if self._states.get(path) in (STATE_QUEUED, STATE_DOWNLOADING):
+                return
+            self._urls[path] = url
+            self._attempts[path] = 0
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="jlc-models", daemon=True)
+                self._thread.start()
+        self._set_state(path, STATE_QUEUED)
+        self._queue.put(path)
+
+    def retry_failed(self):
+        failed = [path for path, state in self.states().items() if state == STATE_FAILED]
+        for path in failed:
+            self.enqueue(self._urls[path], path)
+        return len(failed)
+
+    def states(self):
+        with self._lock:
+            return dict(self._states)
+
+    def summary(self):
+        counts = {}
+        for state in self.states().values():
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def wait_idle(self, timeout=None):
+        # Used by headless callers that have to exit only after the models are on disk
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            counts = self.summary()
+            if not any(counts.get(s) for s in (STATE_QUEUED, STATE_DOWNLOADING, STATE_RETRY)):
+                return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.1)
+
+    def _set_state(self, path, state):
+        with self._lock:
+            self._states[path] = state
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(path, state)
+            except Exception:
+                logger.exception("model fetcher listener failed")
+
+    def _next_due_retry(self):
+        with self._lock:
+            if self._retries and self._retries[0][0] <= time.monotonic():
+                return heapq.heappop(self._retries)[1]
+            return None
+
+    def _run(self):
+        while True:
+            path = self._next_due_retry()
+            if path is None:
+                try:
+                    path = self._queue.get(timeout=1)
+                except queue.Empty:
+                    continue
+            self._download(path)
+
+    def _download(self, path):
+        url = self._urls[path]
+        self._set_state(path, STATE_DOWNLOADING)
+        try:
+            save_model(url, path)
+        except Exception as exc:
+            with self._lock:
+                attempt = self._attempts[path]
+                self._attempts[path] = attempt + 1
+                if attempt < len(self.retry_delays):
+                    heapq.heappush(self._retries, (time.monotonic() + self.retry_delays[attempt], path))
+            state = STATE_RETRY if attempt < len(self.retry_delays) else STATE_FAILED
+            logger.warning(f"3D model download {url} failed ({state}): {type(exc).__name__}: {exc}")
+            self._set_state(path, state)
+            return
+        logger.info(f"3D model saved to {path}")
+        with self._lock:
+            callbacks = self._on_saved.pop(path, [])
+        for callback in callbacks:
+            try:
+                callback(path)
+            except Exception:
+                logger.exception("model saved callback failed")
+        self._set_state(path, STATE_DONE)
+
+
+def get_model_fetcher():
+    global _model_fetcher
+
+    with _model_fetcher_lock:
+        if _model_fetcher is None:
+            _model_fetcher = ModelFetcher()
+        return _model_fetcher
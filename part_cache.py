@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .plugin_config import get_setting, user_cache_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_FILE = "lookup_cache.sqlite3"
+
+_lookup_cache = None
+_lookup_cache_lock = threading.Lock()
+
+
+class LookupCache:
+    # Persistent cache of easyeda /svgs lookups keyed by component_id, with TTL and LRU eviction
+
+    def __init__(self, path, ttl_seconds, max_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lookups ("
+            " component_id TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " uuids TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS lookups_used_at ON lookups (used_at)")
+
+    def get(self, component_id):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, fetched_at FROM lookups WHERE component_id = ?", (component_id,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                return None
+            self._db.execute("UPDATE lookups SET used_at = ? WHERE component_id = ?", (now, component_id))
+        return json.loads(row[0])
+
+    def put(self, component_id, data):
+        now = time.time()
+        uuids = [i["component_uuid"] for i in data.get("result", [])]
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO lookups (component_id, response, uuids, fetched_at, used_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (component_id, json.dumps(data), json.dumps(uuids), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        self._db.execute("DELETE FROM lookups WHERE fetched_at < ?", (time.time() - self.ttl_seconds,))
+        self._db.execute(
+            "DELETE FROM lookups WHERE component_id IN"
+            " (SELECT component_id FROM lookups ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def invalidate(self, component_id):
+        with self._lock:
+            self._db.execute("DELETE FROM lookups WHERE component_id = ?", (component_id,))
+
+
+def get_lookup_cache():
+    # Returns None when the cache can't be opened, callers then always go to the network
+    global _lookup_cache
+
+    with _lookup_cache_lock:
+        if _lookup_cache is None:
+            try:
+                _lookup_cache = LookupCache(
+                    os.path.join(user_cache_dir(), CACHE_FILE),
+                    ttl_seconds=float(get_setting("lookup_cache_ttl_hours")) * 3600,
+                    max_entries=int(get_setting("lookup_cache_max_entries")),
+                )
+            except Exception as exc:
+                logger.warning(f"lookup cache disabled: {type(exc).__name__}: {exc}")
+                _lookup_cache = False
+        return _lookup_cache if _lookup_cache is not False else None
@@ -0,0 +1,161 @@
+# Searchable index of every part the plugin fetched, for the part number typeahead. Kept next to the
+# part store in the user data folder; searching never touches the network.
+#
+# Text is matched as substrings (case-insensitive) of the part number, footprint, symbol and
+# description. With SQLite's FTS5 trigram tokenizer the index answers terms of three or more
+# characters, shorter terms and older SQLite builds fall back to LIKE over the same rows.
+import collections
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .plugin_config import get_setting, user_data_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_FILE = "part_index.sqlite3"
+SEARCH_LIMIT = 12
+# Shortest term the trigram index can answer
+TRIGRAM_LENGTH = 3
+
+PartHit = collections.namedtuple("PartHit", "component_id footprint symbol description datasheet_link")
+
+_part_index = None
+_part_index_lock = threading.Lock()
+
+
+def _like_pattern(term):
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class PartIndex:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parts ("
+            " component_id TEXT PRIMARY KEY,"
+            " footprint_name TEXT NOT NULL DEFAULT '',"
+            " symbol_name TEXT NOT NULL DEFAULT '',"
+            " description TEXT NOT NULL DEFAULT '',"
+            " datasheet_link TEXT NOT NULL DEFAULT '',"
+            " symbols TEXT NOT NULL DEFAULT '{}',"
+            " search_text TEXT NOT NULL DEFAULT '',"
+            " use_count INTEGER NOT NULL DEFAULT 0,"
+            " used_at REAL NOT NULL)"
+        )
+        self.full_text = self._create_full_text_index()
+
+    def _create_full_text_index(self):
+        # The FTS table mirrors parts.search_text through triggers
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5("
+                "search_text, content='parts', content_rowid='rowid', tokenize='trigram')"
+            )
+        except sqlite3.OperationalError as exc:
+            logger.info(f"part search without full text index: {exc}")
+            # Triggers created by an SQLite with FTS5 would make every write fail here
+            for trigger in ("parts_ai", "parts_ad", "parts_au"):
+                self._db.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            return False
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS parts_ai AFTER INSERT ON parts BEGIN"
+            " INSERT INTO parts_fts (rowid, search_text) VALUES (new.rowid, new.search_text); END"
+        )
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS parts_ad AFTER DELETE ON parts BEGIN"
+            " INSERT INTO parts_fts (parts_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text); END"
+        )
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS parts_au AFTER UPDATE OF search_text ON parts BEGIN"
+            " INSERT INTO parts_fts (parts_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text);"
+            " INSERT INTO parts_fts (rowid, search_text) VALUES (new.rowid, new.search_text); END"
+        )
+        return True
+
+    def record(self, component_id, footprint="", symbol="", description="", datasheet_link="", symbols=None):
+        # Empty values keep what an earlier fetch recorded, e.g. a footprint-only fetch keeps the symbol.
+        # symbols ({name: symbol S-expression}) lets a later fetch of the part skip symbol generation.
+        with self._lock:
+            row = self._db.execute(
+                "SELECT footprint_name, symbol_name, description, datasheet_link, symbols FROM parts WHERE component_id = ?",
+                (component_id,),
+            ).fetchone()
+            old = row or ("", "", "", "", "{}")
+            footprint, symbol, description, datasheet_link = (
+                new or previous for new, previous in zip((footprint, symbol, description, datasheet_link), old)
+            )
+            self._db.execute(
+                "INSERT INTO parts (component_id, footprint_name, symbol_name, description, datasheet_link, symbols,"
+                " search_text, use_count, used_at) VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)"
+                " ON CONFLICT (component_id) DO UPDATE SET footprint_name = excluded.footprint_name,"
+                " symbol_name = excluded.symbol_name, description = excluded.description,"
+                " datasheet_link = excluded.datasheet_link, symbols = excluded.symbols,"
+                " search_text = excluded.search_text, use_count = use_count + 1, used_at = excluded.used_at",
+                (
+                    component_id,
+                    footprint,
+                    symbol,
+                    description,
+                    datasheet_link,
+                    json.dumps(symbols) if symbols else old[4],
+                    " ".join((component_id, footprint, symbol, description)),
+                    time.time(),
+                ),
+            )
+
+    def symbols(self, component_id):
+        with self._lock:
+            row = self._db.execute("SELECT symbols FROM parts WHERE component_id = ?", (component_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        # Parts matching every term of text, an exact part number first, then the most used
+        terms = text.split()
+        if not terms:
+            return []
+        indexed = [term for term in terms if len(term) >= TRIGRAM_LENGTH] if self.full_text else []
+        conditions = []
+        params = []
+        if indexed:
+            conditions.append("rowid IN (SELECT rowid FROM parts_fts WHERE parts_fts MATCH ?)")
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in indexed))
+        for term in terms:
+            if term not in indexed:
+                conditions.append("search_text LIKE ? ESCAPE '\\'")
+                params.append(_like_pattern(term))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT component_id, footprint_name, symbol_name, description, datasheet_link FROM parts"
+                f" WHERE {' AND '.join(conditions)}"
+                " ORDER BY component_id = ? COLLATE NOCASE DESC, use_count DESC, used_at DESC LIMIT ?",
+                (*params, terms[0], limit),
+            ).fetchall()
+        return [PartHit(*row) for row in rows]
+
+
+def get_part_index():
+    # Returns None when the index is disabled or can't be opened
+    global _part_index
+
+    with _part_index_lock:
+        if _part_index is None:
+            if not get_setting("part_index_enabled"):
+                _part_index = False
+            else:
+                try:
+                    _part_index = PartIndex(os.path.join(user_data_dir(), INDEX_FILE))
+                except Exception as exc:
+                    logger.warning(f"part index disabled: {type(exc).__name__}: {exc}")
+                    _part_index = False
+        return _part_index if _part_index is not False else None
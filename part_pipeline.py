@@ -0,0 +1,523 @@
+# The part download pipeline without any GUI, shared by the KiCad dialog and the command line (__main__.py)
+import atexit
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import http_client, perf_stats
+from .download_job import STAGE_FOOTPRINT, STAGE_LOOKUP, STAGE_SYMBOL
+from .generation_pool import WorkerUnavailable, close_generation_pool, get_generation_pool
+from .http_client import (
+    DownloadCancelled,
+    check_cancelled,
+    deferred_model_downloads,
+    install_core_hooks,
+    job_runner,
+    prefetch,
+    reset_session,
+    shared_responses,
+)
+from .library_index import get_library_index
+from .model_fetcher import get_model_fetcher, save_model
+from .part_cache import get_lookup_cache
+from .part_index import get_part_index
+from .part_store import get_part_store, unshare
+from .plugin_config import user_cache_dir
+from .single_flight import SingleFlight
+from .symbol_library_writer import get_symbol_library_writer
+
+
+logger = logging.getLogger(__name__)
+
+
+OUTPUT_FOLDER = "JLC2KiCad_lib"
+FOOTPRINT_LIB  = "footprint"
+FOOTPRINT_LIB_NICK  = "jlc"  #set the same as FOOTPRINT_LIB, or to nickname choosen in Footprint libraries manager
+SYMBOL_LIB = "default_lib"
+SYMBOL_LIB_DIR = "symbol"
+MODEL_DIR = "packages3d"
+# Repeats of a finished download within this many seconds return its result without running again
+FETCH_MEMO_SECONDS = 10
+# 3D models of clipboard placements go to one folder per session in the user cache folder.
+# Folders left by earlier sessions are removed once they're this old.
+SCRATCH_DIR = "placement"
+SCRATCH_MAX_AGE = 24 * 3600
+# Symbol properties that don't describe the part, the others (value, resistance, ...) are indexed
+NON_DESCRIPTION_PROPERTIES = ("Reference", "Value", "Footprint", "Datasheet", "ki_keywords", "LCSC")
+
+helper = None
+create_footprint = None
+create_symbol = None
+footprint_info = None
+
+# One download per part and output folder at a time, identical concurrent requests share it
+_fetches = SingleFlight(FETCH_MEMO_SECONDS, retry_on=(DownloadCancelled,), check_cancelled=check_cancelled)
+
+_capture = threading.local()
+_scratch_dir = None
+_scratch_lock = threading.Lock()
+
+_PROPERTY_RE = re.compile(r'\(property "([^"]*)" "([^"]*)"')
+
+
+class ComponentLookupError(Exception):
+    pass
+
+
+def load_core_library():
+    global helper, create_footprint, create_symbol, footprint_info
+
+    if helper and create_footprint and create_symbol:
+        return
+
+    from JLC2KiCadLib import helper as _helper
+    from JLC2KiCadLib.footprint.footprint import create_footprint as _create_footprint
+    from JLC2KiCadLib.symbol.symbol import create_symbol as _create_symbol
+
+    helper = _helper
+    create_footprint = _create_footprint
+    create_symbol = _create_symbol
+    try:
+        from JLC2KiCadLib.footprint.footprint import get_footprint_info as _footprint_info
+    except ImportError:
+        # Older JLC2KiCadLib, the symbol then waits for the whole footprint
+        _footprint_info = None
+    footprint_info = _footprint_info
+    install_core_hooks()
+    install_output_capture()
+    reset_session()
+
+
+@contextlib.contextmanager
+def captured_output():
+    # While active, what JLC2KiCadLib generates on this thread is kept in the yielded dict instead of
+    # being written to disk: footprint path -> S-expression, or symbol name -> symbol S-expression
+    previous = getattr(_capture, "files", None)
+    _capture.files = {}
+    try:
+        yield _capture.files
+    finally:
+        _capture.files = previous
+
+
+def install_output_capture():
+    from JLC2KiCadLib.footprint import footprint
+    from JLC2KiCadLib.symbol import symbol
+
+    base = footprint.KicadFileHandler
+    if not getattr(base, "captures", False):
+        class CapturingFileHandler(base):
+            captures = True
+
+            def writeFile(self, filename, **kwargs):
+                files = getattr(_capture, "files", None)
+                if files is None:
+                    return super().writeFile(filename, **kwargs)
+                files[filename] = self.serialize(**kwargs)
+
+        footprint.KicadFileHandler = CapturingFileHandler
+
+    update_library = symbol.update_library
+    if not getattr(update_library, "captures", False):
+        # create_symbol merges each symbol into the library file through update_library
+        def capturing_update_library(library_name, symbol_path, component_title, template_lib_component, output_dir, skip_existing):
+            files = getattr(_capture, "files", None)
+            if files is None:
+                return update_library(library_name, symbol_path, component_title, template_lib_component, output_dir, skip_existing)
+            files[component_title] = template_lib_component
+
+        capturing_update_library.captures = True
+        symbol.update_library = capturing_update_library
+
+
+def session_scratch_dir():
+    # Replaces a new temp folder per placement, nothing in it has to outlive the session
+    global _scratch_dir
+
+    with _scratch_lock:
+        if _scratch_dir is None:
+            root = os.path.join(user_cache_dir(), SCRATCH_DIR)
+            try:
+                names = os.listdir(root)
+            except OSError:
+                names = []
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    if time.time() - os.path.getmtime(path) > SCRATCH_MAX_AGE:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    pass
+            _scratch_dir = os.path.join(root, f"session-{os.getpid()}")
+            os.makedirs(_scratch_dir, exist_ok=True)
+            atexit.register(shutil.rmtree, _scratch_dir, True)
+        return _scratch_dir
+
+
+def unload_core_library():
+    # Forces the next load_core_library() to import JLC2KiCadLib again, e.g. after an upgrade
+    global helper, create_footprint, create_symbol, footprint_info
+
+    helper = None
+    create_footprint = None
+    create_symbol = None
+    footprint_info = None
+    close_generation_pool()
+
+
+def lookup_component(component_id, refresh=False):
+    cache = get_lookup_cache()
+    if cache is not None and not refresh:
+        data = cache.get(component_id)
+        perf_stats.note_cache("lookup", data is not None)
+        if data is not None:
+            logger.info(f"using cached lookup for component {component_id}")
+            return data
+
+    data = json.loads(
+        http_client.get(f"{http_client.endpoint('easyeda_url')}/api/products/{component_id}/svgs").content.decode()
+    )
+
+    if not data["success"]:
+        if cache is not None:
+            cache.invalidate(component_id)
+        raise ComponentLookupError(f"Failed to get component uuid for {component_id}")
+    if cache is not None:
+        cache.put(component_id, data)
+    return data
+
+
+@contextlib.contextmanager
+def _no_deferred_models():
+    yield []
+
+
+def _generate(kind, defer_models=False, capture=False, **kwargs):
+    # Runs create_footprint/create_symbol, in a worker process when generation_processes is set.
+    # Returns (result, 3D model URLs collected with defer_models, footprints kept in memory with capture).
+    pool = get_generation_pool()
+    if pool is not None:
+        try:
+            return pool.run(kind, kwargs, defer_models, capture)
+        except WorkerUnavailable:
+            pass
+    generator = create_footprint if kind == "footprint" else create_symbol
+    with deferred_model_downloads() if defer_models else _no_deferred_models() as model_urls:
+        with captured_output() if capture else contextlib.nullcontext({}) as files:
+            result = generator(**kwargs)
+    return result, model_urls, files
+
+
+def _generate_footprint(store, data, component_id, out_dir, skip_existing, defer_models, capture=False):
+    # Returns (footprint_name, datasheet_link, footprint text), the text only with capture
+    footprint_component_uuid = data["result"][-1]["component_uuid"]
+    if not capture:
+        # A model materialized from the part store is a hardlink, JLC2KiCadLib writes into it in place
+        footprint_dir = os.path.join(out_dir, FOOTPRINT_LIB)
+        for model in project_library_index(out_dir).lookup(component_id).models:
+            if "$" not in model:
+                unshare(os.path.join(footprint_dir, model))
+    started = time.time()
+    (footprint_name, datasheet_link), model_urls, files = _generate(
+        "footprint",
+        defer_models,
+        capture,
+        footprint_component_uuid=footprint_component_uuid,
+        component_id=component_id,
+        footprint_lib=FOOTPRINT_LIB,
+        output_dir=out_dir,
+        model_base_variable="",
+        model_dir=MODEL_DIR,
+        skip_existing=skip_existing,
+        models="STEP",
+    )
+    component_name = footprint_name.replace(FOOTPRINT_LIB + ":", "")
+    model_path = os.path.join(out_dir, FOOTPRINT_LIB, MODEL_DIR, component_name + ".step")
+    if model_urls:
+        # Drop the empty placeholder, the footprint's relative model path resolves in its library
+        # folder once the model fetcher saves the real file there
+        if os.path.isfile(model_path) and os.path.getsize(model_path) == 0:
+            os.remove(model_path)
+
+    on_model_saved = None
+    footprint_path = os.path.join(out_dir, FOOTPRINT_LIB, component_name + ".kicad_mod")
+    footprint_text = next(iter(files.values()), None)
+    generated = footprint_text is not None or (os.path.isfile(footprint_path) and os.path.getmtime(footprint_path) >= started - 1)
+    # A footprint kept by skip_existing may have been edited in the project, it isn't stored
+    if store is not None and generated:
+        try:
+            store.add_footprint(
+                component_id,
+                footprint_path,
+                datasheet_link,
+                model_path if model_urls or os.path.isfile(model_path) else None,
+                model_urls[-1] if model_urls else "",
+                footprint_text,
+            )
+            on_model_saved = lambda path: store.add_model(component_id, path)
+        except Exception as exc:
+            logger.warning(f"could not add {component_id} to the part store: {type(exc).__name__}: {exc}")
+
+    if model_urls:
+        get_model_fetcher().enqueue(model_urls[-1], model_path, on_model_saved)
+    return footprint_name, datasheet_link, footprint_text
+
+
+def _place_stored_footprint(store, entry, component_id, out_dir, skip_existing, defer_models):
+    logger.info(f"using stored footprint {entry['footprint_name']} for component {component_id}")
+    footprint_dir = os.path.join(out_dir, FOOTPRINT_LIB)
+    missing_model = store.materialize(entry, footprint_dir, os.path.join(footprint_dir, MODEL_DIR), skip_existing)
+    if missing_model:
+        _fetch_stored_model(store, entry, component_id, missing_model, defer_models)
+    return f"{FOOTPRINT_LIB}:{entry['footprint_name']}", entry["datasheet_link"]
+
+
+def _fetch_stored_model(store, entry, component_id, model_path, defer_models):
+    # Downloads the model of a stored part that was stored before its model arrived
+    if not entry["model_url"]:
+        return
+    on_model_saved = lambda path: store.add_model(component_id, path)
+    if defer_models:
+        get_model_fetcher().enqueue(entry["model_url"], model_path, on_model_saved)
+    else:
+        check_cancelled()
+        save_model(entry["model_url"], model_path)
+        on_model_saved(model_path)
+
+
+def fetch_part(component_id, out_dir, get_symbol=False, skip_existing=False, refresh=False, progress=None, defer_models=False):
+    # Raises instead of showing dialogs, so it runs on worker threads and outside KiCad.
+    # progress(stage) is called as the pipeline moves through STAGES.
+    # With defer_models the footprint refers to its STEP model right away and the model file is
+    # downloaded afterwards by the background model fetcher.
+    # Concurrent calls for the same part and folder, e.g. a BOM listing a part twice or a prefetch
+    # racing a button press, share one download instead of writing the same files at the same time.
+    progress = progress or (lambda stage: None)
+
+    def fetch():
+        logger.info(f"creating library for component {component_id}")
+        with perf_stats.recording("download", component_id):
+            return _fetch_part(component_id, out_dir, get_symbol, skip_existing, refresh, progress, defer_models)
+
+    return _fetches.do(
+        (component_id, os.path.abspath(out_dir)),
+        (get_symbol, skip_existing, refresh, defer_models),
+        fetch,
+        use_memo=not refresh,
+        is_valid=_footprint_exists,
+    )
+
+
+def _footprint_exists(result):
+    libpath, component_name = result
+    return os.path.isfile(os.path.join(libpath, component_name + ".kicad_mod"))
+
+
+def render_footprint(component_id, refresh=False, progress=None, defer_models=False):
+    # Returns (component_name, footprint S-expression) for the clipboard without writing the footprint
+    # to disk. Only its 3D model is saved, to the session scratch folder and the part store. The pasted
+    # footprint doesn't resolve the scratch copy, it is kept for the part store only.
+    progress = progress or (lambda stage: None)
+
+    def render():
+        logger.info(f"rendering footprint for component {component_id}")
+        with perf_stats.recording("download", component_id):
+            return _render_footprint(component_id, refresh, progress, defer_models)
+
+    return _fetches.do((component_id, None), (refresh, defer_models), render, use_memo=not refresh)
+
+
+def _render_footprint(component_id, refresh, progress, defer_models):
+    progress(STAGE_LOOKUP)
+    with perf_stats.stage(STAGE_LOOKUP):
+        store = get_part_store()
+        entry = None
+        if store is not None and not refresh:
+            entry = store.get(component_id)
+            perf_stats.note_cache("part_store", entry is not None)
+        if entry is None:
+            data = lookup_component(component_id, refresh)
+
+    check_cancelled()
+    progress(STAGE_FOOTPRINT)
+    scratch_dir = session_scratch_dir()
+    with perf_stats.stage(STAGE_FOOTPRINT):
+        if entry is not None:
+            logger.info(f"using stored footprint {entry['footprint_name']} for component {component_id}")
+            if entry["model_name"] and not entry["model_hash"]:
+                model_path = os.path.join(scratch_dir, FOOTPRINT_LIB, MODEL_DIR, entry["model_name"])
+                os.makedirs(os.path.dirname(model_path), exist_ok=True)
+                _fetch_stored_model(store, entry, component_id, model_path, defer_models)
+            _index_part(component_id, entry["footprint_name"], entry["datasheet_link"])
+            return entry["footprint_name"], store.read_footprint(entry)
+
+        footprint_name, datasheet_link, footprint_text = _generate_footprint(store, data, component_id, scratch_dir, False, defer_models, capture=True)
+    _index_part(component_id, footprint_name, datasheet_link)
+    return footprint_name.replace(FOOTPRINT_LIB + ":", ""), footprint_text
+
+
+def _footprint_and_symbol(footprint, entry, data, component_id, out_dir, skip_existing, progress):
+    # The footprint (with its 3D model) and the symbol are built at the same time:
+    #
+    #   lookup -+-> footprint component ---> footprint + 3D model ---------+-> done
+    #           |                       \--> name, datasheet --> symbol --/
+    #           +-> symbol unit 1..n components -----------------/
+    #
+    # Every component is requested once, up front and in parallel; create_footprint and create_symbol
+    # get the shared responses. Only the symbol waits, for the footprint name and datasheet link, and
+    # it is added to the symbol library once the footprint is done.
+    # Generation workers request the components themselves, then the symbol waits for the footprint.
+    # Returns (footprint_name, datasheet_link, generated symbols).
+    symbol_component_uuid = [i["component_uuid"] for i in data["result"][:-1]]
+    footprint_component_uuid = data["result"][-1]["component_uuid"]
+    in_process = get_generation_pool() is None
+    with shared_responses(), ThreadPoolExecutor(len(symbol_component_uuid) + 2, "jlc-part") as executor:
+        if in_process:
+            if entry is None:
+                prefetch(_component_url(footprint_component_uuid), executor)
+            for uuid in symbol_component_uuid:
+                prefetch(_component_url(uuid), executor)
+        footprint_result = executor.submit(job_runner(footprint))
+
+        if entry is not None:
+            footprint_name, datasheet_link = f"{FOOTPRINT_LIB}:{entry['footprint_name']}", entry["datasheet_link"]
+        elif in_process and footprint_info is not None:
+            name, datasheet_link = footprint_info(footprint_component_uuid)[:2]
+            footprint_name = f"{FOOTPRINT_LIB}:{name}"
+            if not name:
+                footprint_name, datasheet_link = footprint_result.result()
+        else:
+            footprint_name, datasheet_link = footprint_result.result()
+
+        check_cancelled()
+        progress(STAGE_SYMBOL)
+        with perf_stats.stage(STAGE_SYMBOL):
+            # Generated into the scratch folder and captured, the symbol library writer merges it
+            _, _, symbols = _generate(
+                "symbol",
+                False,
+                True,
+                symbol_component_uuid=symbol_component_uuid,
+                footprint_name=footprint_name.replace(FOOTPRINT_LIB, FOOTPRINT_LIB_NICK) #link footprint according to the nickname
+                    .replace(".pretty", ""),  # see https://github.com/TousstNicolas/JLC2KiCad_lib/issues/47
+                datasheet_link=datasheet_link,
+                library_name=SYMBOL_LIB,
+                symbol_path=SYMBOL_LIB_DIR,
+                output_dir=session_scratch_dir(),
+                component_id=component_id,
+                skip_existing=skip_existing,
+            )
+        # A footprint that failed raises here, before its symbol reaches the project library
+        footprint_name, datasheet_link = footprint_result.result()
+        with perf_stats.stage(STAGE_SYMBOL):
+            _add_symbols(out_dir, symbols, skip_existing)
+        return footprint_name, datasheet_link, symbols
+
+
+def _add_symbols(out_dir, symbols, skip_existing):
+    writer = get_symbol_library_writer(symbol_library_path(out_dir))
+    for name, text in symbols.items():
+        writer.add(name, text, skip_existing)
+
+
+def _indexed_symbols(component_id):
+    # Symbols generated by an earlier fetch of the part, {} when there are none
+    index = get_part_index()
+    if index is None:
+        return {}
+    try:
+        return index.symbols(component_id)
+    except Exception as exc:
+        logger.warning(f"could not read {component_id} from the part index: {type(exc).__name__}: {exc}")
+        return {}
+
+
+def _index_part(component_id, footprint_name, datasheet_link="", symbols=None):
+    # Makes the part findable by the part number typeahead, never fails the download
+    index = get_part_index()
+    if index is None:
+        return
+    symbol_name = next(iter(symbols), "") if symbols else ""
+    description = ""
+    if symbol_name:
+        properties = _PROPERTY_RE.findall(symbols[symbol_name])
+        description = " ".join(value for key, value in properties if key not in NON_DESCRIPTION_PROPERTIES and value)
+        datasheet_link = dict(properties).get("Datasheet") or datasheet_link
+    try:
+        index.record(component_id, footprint_name.replace(FOOTPRINT_LIB + ":", ""), symbol_name, description, datasheet_link, symbols)
+    except Exception as exc:
+        logger.warning(f"could not add {component_id} to the part index: {type(exc).__name__}: {exc}")
+
+
+def _component_url(uuid):
+    # The URL JLC2KiCadLib requests for a component, get() maps it to the configured endpoint
+    return f"https://easyeda.com/api/components/{uuid}"
+
+
+def symbol_library_path(out_dir):
+    return os.path.join(out_dir, SYMBOL_LIB_DIR, SYMBOL_LIB + ".kicad_sym")
+
+
+def batched_symbol_writes(out_dir):
+    # Symbols fetched into out_dir while this is active are written to the symbol library once, at
+    # the end, instead of once per part
+    return get_symbol_library_writer(symbol_library_path(out_dir)).hold()
+
+
+def project_library_index(out_dir):
+    return get_library_index(os.path.join(out_dir, FOOTPRINT_LIB), symbol_library_path(out_dir))
+
+
+def _fetch_part(component_id, out_dir, get_symbol, skip_existing, refresh, progress, defer_models):
+    progress(STAGE_LOOKUP)
+    if skip_existing and not refresh:
+        # Nothing to skip-check over the network when the project library already has the part
+        entry = project_library_index(out_dir).lookup(component_id)
+        if entry.footprint and not entry.missing_models and (entry.symbol or not get_symbol):
+            logger.info(f"component {component_id} already in project library as {entry.footprint}")
+            perf_stats.note_cache("project_library", True)
+            _index_part(component_id, entry.footprint)
+            return os.path.join(out_dir, FOOTPRINT_LIB), entry.footprint
+        perf_stats.note_cache("project_library", False)
+
+    with perf_stats.stage(STAGE_LOOKUP):
+        store = get_part_store()
+        entry = None
+        symbols = {}
+        if store is not None and not refresh:
+            entry = store.get(component_id)
+            perf_stats.note_cache("part_store", entry is not None)
+        if entry is not None and get_symbol:
+            # A stored part with indexed symbols is placed without any request
+            symbols = _indexed_symbols(component_id)
+            perf_stats.note_cache("part_index", bool(symbols))
+        if entry is None or (get_symbol and not symbols):
+            data = lookup_component(component_id, refresh)
+
+    check_cancelled()
+    progress(STAGE_FOOTPRINT)
+
+    def footprint():
+        with perf_stats.stage(STAGE_FOOTPRINT):
+            if entry is not None:
+                return _place_stored_footprint(store, entry, component_id, out_dir, skip_existing, defer_models)
+            return _generate_footprint(store, data, component_id, out_dir, skip_existing, defer_models)[:2]
+
+    if not get_symbol or symbols:
+        footprint_name, datasheet_link = footprint()
+        if symbols:
+            progress(STAGE_SYMBOL)
+            with perf_stats.stage(STAGE_SYMBOL):
+                _add_symbols(out_dir, symbols, skip_existing)
+    else:
+        footprint_name, datasheet_link, symbols = _footprint_and_symbol(footprint, entry, data, component_id, out_dir, skip_existing, progress)
+    _index_part(component_id, footprint_name, datasheet_link, symbols)
+    libpath = os.path.join(out_dir, FOOTPRINT_LIB)
+    component_name = footprint_name.replace(FOOTPRINT_LIB + ":", "")
+    return libpath, component_name
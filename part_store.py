@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from .plugin_config import get_setting, user_data_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+STORE_DIR = "store"
+INDEX_FILE = "index.sqlite3"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_part_store = None
+_part_store_lock = threading.Lock()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(source, target):
+    # Hardlink when source and target share a filesystem, copy otherwise
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = target + ".part"
+    try:
+        if os.path.exists(partial):
+            os.remove(partial)
+        os.link(source, partial)
+    except OSError:
+        shutil.copyfile(source, partial)
+    os.replace(partial, target)
+
+
+def copy_file(source, target):
+    # Copies through a temp file, so target is never an inode shared with source
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = f"{target}.{threading.get_ident()}.part"
+    shutil.copyfile(source, partial)
+    os.replace(partial, target)
+
+
+def unshare(path):
+    # JLC2KiCadLib rewrites its files in place. A file hardlinked from the store gets its own copy
+    # first, otherwise the write would change the blob every other project links to.
+    try:
+        if os.stat(path).st_nlink > 1:
+            copy_file(path, path)
+    except FileNotFoundError:
+        pass
+
+
+class PartStore:
+    # User-level store shared by all projects. Footprints and 3D models are kept once as
+    # blobs named by their sha256, and an index maps component_id to the blobs.
+    # Files are copied into the store, never linked, since JLC2KiCadLib and KiCad rewrite
+    # project files in place. Models are hardlinked out into projects and unshared before
+    # a regeneration writes over them; footprints are copied, they are small and KiCad's
+    # footprint editor saves them in place.
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, INDEX_FILE), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parts ("
+            " component_id TEXT PRIMARY KEY,"
+            " footprint_name TEXT NOT NULL,"
+            " footprint_hash TEXT NOT NULL,"
+            " datasheet_link TEXT NOT NULL,"
+            " model_name TEXT NOT NULL DEFAULT '',"
+            " model_hash TEXT NOT NULL DEFAULT '',"
+            " model_url TEXT NOT NULL DEFAULT '',"
+            " updated_at REAL NOT NULL)"
+        )
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _add_blob(self, path):
+        digest = file_hash(path)
+        blob = self.blob_path(digest)
+        if not os.path.isfile(blob):
+            copy_file(path, blob)
+        return digest
+
+    def _add_text_blob(self, text):
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(digest)
+        if not os.path.isfile(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            partial = f"{blob}.{threading.get_ident()}.part"
+            with open(partial, "wb") as file:
+                file.write(data)
+            os.replace(partial, blob)
+        return digest
+
+    def get(self, component_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT footprint_name, footprint_hash, datasheet_link, model_name, model_hash, model_url"
+                " FROM parts WHERE component_id = ?",
+                (component_id,),
+            ).fetchone()
+        if row is None or not os.path.isfile(self.blob_path(row[1])):
+            return None
+        keys = ("footprint_name", "footprint_hash", "datasheet_link", "model_name", "model_hash", "model_url")
+        return dict(zip(keys, row))
+
+    def add_footprint(self, component_id, footprint_path, datasheet_link, model_path=None, model_url="", footprint_text=None):
+        # footprint_text is the footprint when it was generated in memory, footprint_path then only names it
+        footprint_hash = self._add_blob(footprint_path) if footprint_text is None else self._add_text_blob(footprint_text)
+        model_name = os.path.basename(model_path) if model_path else ""
+        model_hash = ""
+        if model_path and os.path.isfile(model_path) and os.path.getsize(model_path):
+            model_hash = self._add_blob(model_path)
+        with self._lock:
+            old = self._db.execute(
+                "SELECT footprint_hash, model_hash FROM parts WHERE component_id = ?", (component_id,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO parts (component_id, footprint_name, footprint_hash, datasheet_link,"
+                " model_name, model_hash, model_url, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    component_id,
+                    os.path.splitext(os.path.basename(footprint_path))[0],
+                    footprint_hash,
+                    datasheet_link or "",
+                    model_name,
+                    model_hash,
+                    model_url,
+                    time.time(),
+                ),
+            )
+            if old:
+                self._drop_unreferenced(old)
+
+    def add_model(self, component_id, model_path):
+        # Called when a deferred model download finishes
+        model_hash = self._add_blob(model_path)
+        with self._lock:
+            old = self._db.execute("SELECT model_hash FROM parts WHERE component_id = ?", (component_id,)).fetchone()
+            self._db.execute(
+                "UPDATE parts SET model_name = ?, model_hash = ? WHERE component_id = ?",
+                (os.path.basename(model_path), model_hash, component_id),
+            )
+            if old and old[0] != model_hash:
+                self._drop_unreferenced(old)
+
+    def _drop_unreferenced(self, digests):
+        for digest in digests:
+            if not digest:
+                continue
+            count = self._db.execute(
+                "SELECT COUNT(*) FROM parts WHERE footprint_hash = ? OR model_hash = ?", (digest, digest)
+            ).fetchone()[0]
+            if count == 0:
+                try:
+                    os.remove(self.blob_path(digest))
+                except OSError:
+                    pass
+
+    def read_footprint(self, entry):
+        with open(self.blob_path(entry["footprint_hash"]), "r", encoding="utf-8", newline="") as file:
+            return file.read()
+
+    def materialize(self, entry, footprint_dir, model_dir, skip_existing=False):
+        # Places the stored footprint (and model, if stored) into a library folder.
+        # Returns the model path that is still missing, or "" when everything is in place.
+        footprint_path = os.path.join(footprint_dir, entry["footprint_name"] + ".kicad_mod")
+        if not (skip_existing and os.path.isfile(footprint_path)):
+            os.makedirs(footprint_dir, exist_ok=True)
+            partial = footprint_path + ".part"
+            shutil.copyfile(self.blob_path(entry["footprint_hash"]), partial)
+            os.replace(partial, footprint_path)
+
+        if not entry["model_name"]:
+            return ""
+        model_path = os.path.join(model_dir, entry["model_name"])
+        if os.path.isfile(model_path) and os.path.getsize(model_path):
+            return ""
+        if entry["model_hash"] and os.path.isfile(self.blob_path(entry["model_hash"])):
+            link_or_copy(self.blob_path(entry["model_hash"]), model_path)
+            return ""
+        return model_path
+
+
+def get_part_store():
+    # Returns None when the store is disabled or can't be opened
+    global _part_store
+
+    with _part_store_lock:
+        if _part_store is None:
+            if not get_setting("part_store_enabled"):
+                _part_store = False
+            else:
+                try:
+                    _part_store = PartStore(os.path.join(user_data_dir(), STORE_DIR))
+                except Exception as exc:
+                    logger.warning(f"part store disabled: {type(exc).__name__}: {exc}")
+                    _part_store = False
+        return _part_store if _part_store is not False else None
@@ -0,0 +1,199 @@
+import contextlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from .plugin_config import get_setting, user_data_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+STATS_FILE = "stats.jsonl"
+# The file is trimmed to its newer half once it grows past this size
+MAX_STATS_BYTES = 1024 * 1024
+PERCENTILES = (50, 90, 99)
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def stats_path():
+    return os.path.join(user_data_dir(), STATS_FILE)
+
+
+class RunRecord:
+    # Timings of one download or one placement. Stages are timed with time.perf_counter,
+    # bytes received over HTTP are charged to the stage that is active on the requesting thread.
+
+    def __init__(self, kind, component_id=""):
+        self.kind = kind
+        self.component_id = component_id
+        self.started_at = time.time()
+        self.status = "ok"
+        self.stages = []
+        self.caches = {}
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        entry = {"stage": name, "ms": 0.0, "bytes": 0}
+        previous = getattr(_local, "stage", None)
+        _local.stage = entry
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["ms"] = round((time.perf_counter() - start) * 1000, 3)
+            _local.stage = previous
+            self.stages.append(entry)
+
+    def to_dict(self):
+        return {
+            "time": round(self.started_at, 3),
+            "kind": self.kind,
+            "component_id": self.component_id,
+            "status": self.status,
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 3),
+            "stages": self.stages,
+            "caches": self.caches,
+        }
+
+
+@contextlib.contextmanager
+def recording(kind, component_id=""):
+    # Makes a RunRecord current on this thread and writes it out when the block ends
+    record = RunRecord(kind, component_id)
+    previous = getattr(_local, "record", None)
+    _local.record = record
+    try:
+        yield record
+    except BaseException as exc:
+        record.status = "cancelled" if type(exc).__name__ == "DownloadCancelled" else "error"
+        raise
+    finally:
+        _local.record = previous
+        write_record(record.to_dict())
+
+
+def current_record():
+    return getattr(_local, "record", None)
+
+
+@contextlib.contextmanager
+def attached(record):
+    # Makes record, e.g. the caller's current_record(), current on another thread without writing it out
+    previous = getattr(_local, "record", None)
+    _local.record = record
+    try:
+        yield record
+    finally:
+        _local.record = previous
+
+
+def stage(name):
+    record = getattr(_local, "record", None)
+    if record is None:
+        return contextlib.nullcontext()
+    return record.stage(name)
+
+
+def add_bytes(count):
+    entry = getattr(_local, "stage", None)
+    if entry is not None:
+        entry["bytes"] += count
+
+
+def note_cache(name, hit):
+    record = getattr(_local, "record", None)
+    if record is not None:
+        record.caches[name] = "hit" if hit else "miss"
+
+
+def write_record(record):
+    if not get_setting("perf_stats_enabled"):
+        return
+    path = stats_path()
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    with _write_lock:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(line)
+                size = file.tell()
+            if size > MAX_STATS_BYTES:
+                _trim(path)
+        except OSError as exc:
+            logger.warning(f"could not write performance record: {type(exc).__name__}: {exc}")
+
+
+def _trim(path):
+    with open(path, "r", encoding="utf-8") as file:
+        lines = file.readlines()
+    partial = path + ".part"
+    with open(partial, "w", encoding="utf-8") as file:
+        file.writelines(lines[len(lines) // 2:])
+    os.replace(partial, path)
+
+
+def read_records(limit=500):
+    try:
+        with open(stats_path(), "r", encoding="utf-8") as file:
+            lines = file.readlines()[-limit:]
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of an unsorted list
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(records):
+    # Returns ({(kind, stage): {"count", "p50", "p90", "p99", "max", "bytes"}}, {cache: (hits, total)})
+    timings = {}
+    sizes = {}
+    caches = {}
+    for record in records:
+        kind = record.get("kind", "")
+        if record.get("status") == "ok":
+            timings.setdefault((kind, "total"), []).append(record.get("total_ms", 0.0))
+        for entry in record.get("stages", []):
+            key = (kind, entry["stage"])
+            timings.setdefault(key, []).append(entry["ms"])
+            sizes.setdefault(key, []).append(entry.get("bytes", 0))
+        for name, result in record.get("caches", {}).items():
+            hits, total = caches.get(name, (0, 0))
+            caches[name] = (hits + (result == "hit"), total + 1)
+
+    stages = {}
+    for key, values in timings.items():
+        summary = {"count": len(values), "max": max(values)}
+        for pct in PERCENTILES:
+            summary[f"p{pct}"] = percentile(values, pct)
+        byte_counts = sizes.get(key, [])
+        summary["bytes"] = sum(byte_counts) / len(byte_counts) if byte_counts else 0
+        stages[key] = summary
+    return stages, caches
+
+
+def clear_records():
+    with _write_lock:
+        try:
+            os.remove(stats_path())
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,72 @@
+import collections
+import logging
+import os
+import subprocess
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+# Lines of pip output kept for error messages
+OUTPUT_TAIL_LINES = 30
+
+
+class PipJob:
+    # Runs a pip command in a subprocess and reads its output (stdout and stderr) on a worker thread.
+    # on_line(line) is called for each output line and on_done(returncode) once pip exited, both from
+    # the worker thread. returncode is None when the job was cancelled.
+
+    def __init__(self, cmd, on_line=None, on_done=None):
+        self.cmd = cmd
+        self.on_line = on_line
+        self.on_done = on_done
+        self.last_line = ""
+        self.output = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+        self.returncode = None
+        self.process = None
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jlc-pip", daemon=True)
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def start(self):
+        # Raises OSError when the interpreter can't be started
+        env = dict(os.environ)
+        env["PYTHONUNBUFFERED"] = "1"
+        env["PYTHONIOENCODING"] = "utf-8"
+        self.process = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env=env,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+    def _run(self):
+        for line in self.process.stdout:
+            line = line.rstrip()
+            if not line:
+                continue
+            logger.info(f"pip: {line}")
+            self.last_line = line
+            self.output.append(line)
+            if self.on_line:
+                self.on_line(line)
+        returncode = self.process.wait()
+        self.returncode = None if self.cancelled else returncode
+        if self.on_done:
+            self.on_done(self.returncode)
@@ -0,0 +1,174 @@
+# Puts a downloaded footprint in the user's hand once the part dialog closed: copies it to the
+# clipboard and pastes it into the PCB editor as soon as the editor frame is active again, or adds it
+# to the board through pcbnew when the clipboard can't be used.
+#
+# The editor frame and its canvas are looked up once and reused while they exist. Readiness is
+# confirmed by the frame's activation event instead of fixed sleeps; READY_TIMEOUT_MS bounds the wait.
+import logging
+import os
+import time
+
+import pcbnew
+import wx
+
+from . import perf_stats
+from .part_pipeline import FOOTPRINT_LIB, session_scratch_dir
+
+
+# Name KiCad gives its PCB editor frame (PCB_EDIT_FRAME_NAME)
+PCB_FRAME_NAME = "PcbFrame"
+# KiCad versions whose canvas takes injected ESC and Ctrl+V key events
+PASTE_VERSIONS = ("5.99", "6.", "7.")
+READY_TIMEOUT_MS = 500
+
+READY_ACTIVE = "active"
+READY_ACTIVATED = "activated"
+READY_TIMEOUT = "timeout"
+
+
+class PlacementEngine:
+    def __init__(self, kicad_build_version):
+        self.kicad_build_version = kicad_build_version
+        self.logger = logging.getLogger(__name__)
+        self._frame = None
+        self._canvas = None
+
+    def supports_paste(self):
+        return any(version in self.kicad_build_version for version in PASTE_VERSIONS)
+
+    def editor_frame(self):
+        # wx windows that were destroyed evaluate to False, the cached frame is then looked up again
+        if not self._frame:
+            self._frame = self._find_frame()
+            self._canvas = None
+        return self._frame
+
+    def canvas(self):
+        frame = self.editor_frame()
+        if frame and not self._canvas:
+            self._canvas = next((child for child in frame.GetChildren() if child.GetClassName() == "wxWindow"), None)
+        return self._canvas
+
+    @staticmethod
+    def _find_frame():
+        frame = wx.FindWindowByName(PCB_FRAME_NAME)
+        if frame:
+            return frame
+        # Older versions: match the title of the top level windows
+        frames = [
+            window
+            for window in wx.GetTopLevelWindows()
+            if ("pcbnew" in window.GetTitle().lower() and "python" not in window.GetTitle().lower())
+            or "pcb editor" in window.GetTitle().lower()
+        ]
+        return frames[0] if len(frames) == 1 else None
+
+    def place(self, board, component_name, footprint_text):
+        # Returns right after the clipboard copy, the paste runs from the event loop when the editor is ready
+        record = perf_stats.RunRecord("place", component_name)
+        started = time.perf_counter()
+        with record.stage("clipboard"):
+            self.logger.log(logging.DEBUG, "Loading footprint into the clipboard")
+            copied = _copy_to_clipboard(footprint_text)
+
+        if not copied:
+            self.logger.log(logging.DEBUG, "Clipboard error")
+            with record.stage("board"):
+                self._add_to_board(board, component_name, footprint_text)
+            self._finish(record, started, "board")
+            wx.MessageBox("Clipboard couldn't be opened. Footprint " + component_name + " was placed in top left corner of the canvas")
+            return
+
+        if not self.supports_paste():
+            self.logger.log(logging.ERROR, f'Version check failed "{self.kicad_build_version}" not in version list, paste the footprint with Ctrl+V')
+            self._finish(record, started, "clipboard")
+            return
+
+        with record.stage("resolve"):
+            frame = self.editor_frame()
+            canvas = self.canvas()
+        if not frame:
+            self.logger.log(logging.ERROR, "No pcbnew window found")
+            self._finish(record, started, "clipboard")
+            return
+
+        waiting = time.perf_counter()
+
+        def on_ready(reason):
+            record.stages.append({"stage": "ready", "ms": round((time.perf_counter() - waiting) * 1000, 3), "bytes": 0})
+            with record.stage("paste"):
+                self._paste(frame, canvas)
+            self._finish(record, started, f"paste after {reason}")
+
+        self._when_active(frame, on_ready)
+
+    def _finish(self, record, started, how):
+        self.logger.log(logging.INFO, f"footprint {record.component_id} in hand by {how} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        perf_stats.write_record(record.to_dict())
+
+    def _when_active(self, frame, callback):
+        # Calls callback(reason) once the editor frame has the focus again, at the latest after READY_TIMEOUT_MS
+        if frame.IsActive():
+            callback(READY_ACTIVE)
+            return
+
+        fired = []
+
+        def fire(reason):
+            if fired or not frame:
+                return
+            fired.append(reason)
+            frame.Unbind(wx.EVT_ACTIVATE, handler=on_activate)
+            timeout.Stop()
+            callback(reason)
+
+        def on_activate(event):
+            event.Skip()
+            if event.GetActive():
+                # Let KiCad finish its own activation handling before keys arrive
+                wx.CallAfter(fire, READY_ACTIVATED)
+
+        frame.Bind(wx.EVT_ACTIVATE, on_activate)
+        timeout = wx.CallLater(READY_TIMEOUT_MS, fire, READY_TIMEOUT)
+        frame.Raise()
+
+    def _paste(self, frame, canvas):
+        # Footprint string pasting based on KiBuzzard https://github.com/gregdavill/KiBuzzard/blob/main/KiBuzzard/plugin.py
+        try:
+            # Both events go through the event queue in order, ESC closes other activities before Ctrl+V
+            esc_evt = wx.KeyEvent(wx.wxEVT_CHAR_HOOK)
+            esc_evt.SetKeyCode(wx.WXK_ESCAPE)
+            v_evt = wx.KeyEvent(wx.wxEVT_CHAR_HOOK)
+            v_evt.SetKeyCode(ord("V"))
+            v_evt.SetControlDown(True)
+            self.logger.log(logging.INFO, f"Injecting ESC and Ctrl+V events into window: {canvas}")
+            wx.PostEvent(canvas, esc_evt)
+            wx.PostEvent(canvas, v_evt)
+        except Exception:
+            # Likely on Linux with old wx python support :(
+            self.logger.log(logging.INFO, "Using wx.UIActionSimulator for paste")
+            frame.SetFocus()
+            wx.UIActionSimulator().Char(ord("V"), wx.MOD_CONTROL)
+
+    @staticmethod
+    def _add_to_board(board, component_name, footprint_text):
+        # FootprintLoad only reads libraries, so this writes the footprint once to the session scratch folder
+        libpath = os.path.join(session_scratch_dir(), FOOTPRINT_LIB)
+        os.makedirs(libpath, exist_ok=True)
+        with open(os.path.join(libpath, component_name + ".kicad_mod"), "w", encoding="utf-8", newline="\n") as file:
+            file.write(footprint_text)
+        fp: pcbnew.FOOTPRINT = pcbnew.FootprintLoad(libpath, component_name)
+        fp.SetPosition(pcbnew.VECTOR2I(0, 0))
+        board.Add(fp)
+        pcbnew.Refresh()
+
+
+def _copy_to_clipboard(text):
+    clipboard = wx.Clipboard.Get()
+    if not clipboard.Open():
+        return False
+    try:
+        clipboard.SetData(wx.TextDataObject(text))
+    finally:
+        clipboard.Close()
+    return True
@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import sys
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+APP_NAME = "JLC2KiCad_gui"
+CONFIG_FILE = "config.json"
+
+# Every key can be overridden in config.json in the user data folder
+DEFAULTS = {
+    "lookup_cache_ttl_hours": 24 * 7,
+    "lookup_cache_max_entries": 5000,
+    "http_connect_timeout": 5,
+    "http_read_timeout": 30,
+    "http_retries": 3,
+    # Client-side limits for easyeda, the concurrency window adapts below the maximum on throttling
+    "easyeda_requests_per_second": 20,
+    "easyeda_max_concurrency": 8,
+    "defer_3d_models": True,
+    "part_store_enabled": True,
+    # Index of fetched parts behind the part number typeahead
+    "part_index_enabled": True,
+    "perf_stats_enabled": True,
+    # Level of the plugin's log file, DEBUG adds a line per HTTP request
+    "log_level": "INFO",
+    # How long the latest JLC2KiCadLib version from PyPI is reused before it is checked again
+    "version_check_ttl_hours": 24,
+    # Worker processes for footprint/symbol generation, 0 generates in KiCad's own interpreter
+    "generation_processes": 0,
+    # Folder of JLC2KiCadLib wheels (pip --find-links) for installs and upgrades, and whether PyPI is skipped
+    "core_wheelhouse": "",
+    "core_wheelhouse_only": False,
+    # Base URLs of the services the plugin talks to, e.g. to point them at benchmarks/stub_server.py
+    "easyeda_url": "https://easyeda.com",
+    "easyeda_models_url": "https://modules.easyeda.com",
+    "pypi_url": "https://pypi.org",
+}
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def _platform_dir(windows_env, mac_dir, xdg_env, xdg_default):
+    if sys.platform == "win32":
+        base = os.environ.get(windows_env) or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", mac_dir))
+    else:
+        base = os.environ.get(xdg_env) or os.path.expanduser(xdg_default)
+    return os.path.join(base, APP_NAME)
+
+
+def user_data_dir():
+    return _platform_dir("LOCALAPPDATA", "Application Support", "XDG_DATA_HOME", "~/.local/share")
+
+
+def user_cache_dir():
+    path = _platform_dir("LOCALAPPDATA", "Caches", "XDG_CACHE_HOME", "~/.cache")
+    if sys.platform == "win32":
+        path = os.path.join(path, "Cache")
+    return path
+
+
+def config_path():
+    return os.path.join(user_data_dir(), CONFIG_FILE)
+
+
+def load_config(reload=False):
+    global _config
+
+    with _config_lock:
+        if _config is not None and not reload:
+            return _config
+        config = dict(DEFAULTS)
+        try:
+            with open(config_path(), "r", encoding="utf-8") as file:
+                config.update(json.load(file))
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            logger.warning(f"ignoring unreadable config {config_path()}: {type(exc).__name__}: {exc}")
+        _config = config
+        return _config
+
+
+def get_setting(name):
+    return load_config().get(name, DEFAULTS.get(name))
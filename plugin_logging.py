@@ -0,0 +1,89 @@
+# Logging of the plugin inside KiCad. Records of the plugin's loggers (the package logger and its
+# children) are queued by the thread that logs them and written to stderr and a rotating log file by a
+# listener thread, so no disk write happens on the UI thread.
+#
+# Warnings and errors JLC2KiCadLib logs through the root logger go to the same file; a filter on the
+# handler keeps out the records of KiCad and other plugins.
+#
+# setup_logging() is idempotent: the handler is attached to the package logger once per KiCad session,
+# also when the plugin modules are loaded again by "Refresh Plugins"; later calls only apply the level.
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+from .plugin_config import get_setting, user_data_dir
+
+
+LOG_FILE = "JLC2KiCad_gui.log"
+# The log file is rotated at this size, keeping LOG_BACKUPS older files
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+LOG_FORMAT = "%(asctime)s %(name)s %(lineno)d:%(message)s"
+CORE_PACKAGE_DIR = f"{os.sep}JLC2KiCadLib{os.sep}"
+
+_setup_lock = threading.Lock()
+
+
+def log_path():
+    return os.path.join(user_data_dir(), LOG_FILE)
+
+
+def _plugin_handler(logger):
+    return next((handler for handler in logger.handlers if getattr(handler, "jlc_plugin_handler", False)), None)
+
+
+def _from_core_library(record):
+    return record.name.split(".")[0] == "JLC2KiCadLib" or CORE_PACKAGE_DIR in record.pathname
+
+
+def set_log_level(level):
+    # Takes effect immediately, e.g. set_log_level("DEBUG") from KiCad's scripting console
+    logger = logging.getLogger(__package__)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def setup_logging():
+    logger = logging.getLogger(__package__)
+    with _setup_lock:
+        try:
+            set_log_level(get_setting("log_level"))
+        except ValueError:
+            logger.setLevel(logging.INFO)
+            logger.warning(f"unknown log_level {get_setting('log_level')!r}, using INFO")
+        if _plugin_handler(logger) is not None:
+            return logger
+
+        formatter = logging.Formatter(LOG_FORMAT, datefmt="%m-%d %H:%M:%S")
+        handlers = [logging.StreamHandler(sys.stderr)]
+        try:
+            os.makedirs(user_data_dir(), exist_ok=True)
+            handlers.append(
+                logging.handlers.RotatingFileHandler(log_path(), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8", delay=True)
+            )
+        except OSError as exc:
+            print(f"JLC2KiCad: can't write {log_path()}, logging to stderr only: {exc}", file=sys.stderr)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        records = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(records, *handlers)
+        handler = logging.handlers.QueueHandler(records)
+        handler.jlc_plugin_handler = True
+        handler.listener = listener
+        listener.start()
+        atexit.register(listener.stop)
+
+        logger.addHandler(handler)
+        # KiCad's own handlers on the root logger don't get the plugin's records a second time
+        logger.propagate = False
+
+        root_handler = logging.handlers.QueueHandler(records)
+        root_handler.setLevel(logging.WARNING)
+        root_handler.addFilter(_from_core_library)
+        root_handler.jlc_plugin_handler = True
+        logging.getLogger().addHandler(root_handler)
+    return logger
@@ -0,0 +1,156 @@
+import email.utils
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from .plugin_config import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+# Lower runs first: a part the user waits for, then batch and board sync downloads, then prefetches
+# and background 3D model downloads
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_BACKGROUND = 2
+
+MIN_WINDOW = 1
+# A 429 also halves the request rate, down to this share of the configured rate but not below one
+# request per second (or the configured rate, when that is lower); each success restores RATE_RECOVERY of it
+MIN_RATE_SHARE = 0.05
+RATE_RECOVERY = 0.005
+# A response this many times slower than the average, and at least LATENCY_SPIKE_MIN seconds, counts as a slowdown
+LATENCY_SPIKE_FACTOR = 3.0
+LATENCY_SPIKE_MIN = 1.0
+LATENCY_EWMA_ALPHA = 0.2
+# The window shrinks at most once per cooldown, a burst of errors from one overload counts once
+DECREASE_COOLDOWN = 1.0
+# Pause after a 429 without Retry-After, doubled on each further 429 in a row
+THROTTLE_PAUSE = 2.0
+MAX_PAUSE = 120.0
+POLL_INTERVAL = 0.1
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def parse_retry_after(value):
+    # Retry-After is either seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostScheduler:
+    # Admits requests to one host through a token bucket (rate per second, bursts up to one second's
+    # worth but always room for one request) and a concurrency window. The window grows by one per window of successful responses and
+    # halves on 429/5xx responses and connection errors; latency spikes shrink it by a quarter.
+    # A 429 halves the rate too and Retry-After pauses the host. Waiting requests are admitted by
+    # priority, then in arrival order.
+
+    def __init__(self, host, rate, max_concurrency):
+        self.host = host
+        self.max_rate = max(0.1, float(rate))
+        self.rate = self.max_rate
+        self.max_concurrency = max(MIN_WINDOW, int(max_concurrency))
+        self.window = float(self.max_concurrency)
+        self.in_flight = 0
+        self._tokens = max(1.0, self.rate)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._pause = 0.0
+        self._last_decrease = 0.0
+        self._latency = None
+        self._waiting = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        if now > self._refilled:
+            self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+
+    def acquire(self, priority=PRIORITY_BACKGROUND, cancel_event=None):
+        # Blocks until the request may be sent, False when cancel_event was set meanwhile
+        ticket = (priority, next(self._tickets))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return False
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiting[0] == ticket:
+                        delay = self._paused_until - now
+                        if delay <= 0 and self._tokens < 1:
+                            delay = (1 - self._tokens) / self.rate
+                        if delay <= 0 and self.in_flight < max(MIN_WINDOW, int(self.window)):
+                            self._tokens -= 1
+                            self.in_flight += 1
+                            return True
+                    else:
+                        delay = POLL_INTERVAL
+                    # A free slot notifies, the poll catches cancellation and refills
+                    self._cond.wait(min(max(delay, 0.001), POLL_INTERVAL))
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def release(self, status=None, latency=None, retry_after=None, failed=False):
+        # status and latency (seconds to the response headers) of the request, failed for connection
+        # errors and timeouts. Without any of them, e.g. a cancelled request, the window is unchanged.
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            throttled = status == 429 or (status is not None and status >= 500)
+            if retry_after is not None or status == 429:
+                self._pause = retry_after if retry_after is not None else min(MAX_PAUSE, max(THROTTLE_PAUSE, self._pause * 2))
+                self._paused_until = max(self._paused_until, now + min(self._pause, MAX_PAUSE))
+                # No burst when the pause ends, tokens accumulate from then on
+                self._tokens = min(self._tokens, 0.0)
+                self._refilled = self._paused_until
+                logger.warning(f"{self.host} asked to slow down (HTTP {status}), pausing {self._pause:.1f} s")
+            if throttled or failed:
+                self._decrease(now, 0.5, status == 429)
+            elif latency is not None:
+                if self._latency is not None and latency > max(LATENCY_SPIKE_MIN, LATENCY_SPIKE_FACTOR * self._latency):
+                    self._decrease(now, 0.75)
+                else:
+                    self._pause = 0.0
+                    self.window = min(self.max_concurrency, self.window + 1 / self.window)
+                    self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY)
+                self._latency = latency if self._latency is None else self._latency + LATENCY_EWMA_ALPHA * (latency - self._latency)
+            self._cond.notify_all()
+
+    def _decrease(self, now, factor, slow_rate=False):
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.window = max(MIN_WINDOW, self.window * factor)
+        if slow_rate:
+            self.rate = max(self.max_rate * MIN_RATE_SHARE, min(1.0, self.max_rate), self.rate * factor)
+        logger.info(f"{self.host} concurrency window reduced to {self.window:.1f}, {self.rate:.1f} requests/s")
+
+
+def get_scheduler(host):
+    with _schedulers_lock:
+        scheduler = _schedulers.get(host)
+        if scheduler is None:
+            scheduler = _schedulers[host] = HostScheduler(
+                host,
+                get_setting("easyeda_requests_per_second"),
+                get_setting("easyeda_max_concurrency"),
+            )
+        return scheduler
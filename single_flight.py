@@ -0,0 +1,75 @@
+import threading
+import time
+
+
+POLL_INTERVAL = 0.1
+
+
+class _Flight:
+    def __init__(self, variant):
+        self.variant = variant
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Runs at most one call per key at a time. A caller that arrives while a call with the same key and
+    # variant is running shares its result or error; a different variant waits for it and then runs.
+    # Results are remembered for memo_seconds, so immediate repeats return without running again.
+    # Errors in retry_on, e.g. the leader got cancelled, aren't shared: a waiting caller runs itself.
+    def __init__(self, memo_seconds=0.0, retry_on=(), check_cancelled=None):
+        self.memo_seconds = memo_seconds
+        self.retry_on = tuple(retry_on)
+        self._check_cancelled = check_cancelled or (lambda: None)
+        self._flights = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def _memo_hit(self, key, variant, is_valid):
+        entry = self._memo.get(key)
+        if entry is None:
+            return False, None
+        expires, memo_variant, result = entry
+        if expires < time.monotonic():
+            del self._memo[key]
+            return False, None
+        if memo_variant != variant or (is_valid is not None and not is_valid(result)):
+            return False, None
+        return True, result
+
+    def do(self, key, variant, fn, use_memo=True, is_valid=None):
+        while True:
+            with self._lock:
+                if use_memo:
+                    hit, result = self._memo_hit(key, variant, is_valid)
+                    if hit:
+                        return result
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight(variant)
+                    break
+
+            while not flight.done.wait(POLL_INTERVAL):
+                self._check_cancelled()
+            if flight.variant != variant or isinstance(flight.error, self.retry_on):
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                self._memo.pop(key, None)
+                if flight.error is None and self.memo_seconds > 0:
+                    now = time.monotonic()
+                    self._memo = {k: entry for k, entry in self._memo.items() if entry[0] >= now}
+                    self._memo[key] = (now + self.memo_seconds, variant, flight.result)
+            flight.done.set()
+        return flight.result
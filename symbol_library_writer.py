@@ -0,0 +1,129 @@
+# Writes symbols into a project's shared .kicad_sym. JLC2KiCadLib rereads and rewrites the whole
+# library for every part; instead, generated symbols are queued here and merged into the file in one
+# pass and one atomic write (temp file + rename) per download or batch.
+import contextlib
+import logging
+import os
+import re
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+LIBRARY_HEADER = "(kicad_symbol_lib (version 20210201) (generator TousstNicolas/JLC2KiCad_lib)\n"
+LIBRARY_FOOTER = ")\n"
+# Queued symbols are written out at the latest when this many are waiting, also inside hold()
+MAX_PENDING = 200
+
+# Top level symbols, indented by two spaces (JLC2KiCadLib) or a tab (saved by KiCad)
+SYMBOL_START_RE = re.compile(r'^(?:  |\t)\(symbol "([^"]+)"', re.MULTILINE)
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def merge_symbols(content, symbols):
+    # Returns content with symbols ({name: (symbol text, skip_existing)}) merged in: a symbol already
+    # in the library is replaced unless skip_existing, new ones are appended before the footer
+    if not content.strip():
+        content = LIBRARY_HEADER + LIBRARY_FOOTER
+    elif ")" not in content:
+        content += LIBRARY_FOOTER
+    footer = content.rfind(")")
+    matches = [match for match in SYMBOL_START_RE.finditer(content, 0, footer)]
+    ends = [match.start() for match in matches[1:]] + [footer]
+
+    parts = []
+    position = 0
+    merged = set()
+    for match, end in zip(matches, ends):
+        name = match.group(1)
+        if name not in symbols or name in merged:
+            continue
+        merged.add(name)
+        text, skip_existing = symbols[name]
+        if skip_existing:
+            logger.info(f"component {name} already in symbols library, skipping")
+            continue
+        parts.append(content[position:match.start()])
+        parts.append(text)
+        position = end
+    parts.append(content[position:footer])
+    parts.extend(text for name, (text, _) in symbols.items() if name not in merged)
+    parts.append(content[footer:])
+    return "".join(parts)
+
+
+class SymbolLibraryWriter:
+    # The only writer of one library file in this process. add() queues a symbol, a later symbol
+    # with the same name replaces a queued one. Queued symbols are written when the last hold() ends,
+    # right away when nothing holds the writer, or when MAX_PENDING are waiting.
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = {}
+        self._holds = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def add(self, name, text, skip_existing=False):
+        with self._lock:
+            self._pending[name] = (text, skip_existing)
+            write_now = self._holds == 0 or len(self._pending) >= MAX_PENDING
+        if write_now:
+            self.flush()
+
+    @contextlib.contextmanager
+    def hold(self):
+        with self._lock:
+            self._holds += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._holds -= 1
+                write_now = self._holds == 0
+            if write_now:
+                try:
+                    self.flush()
+                except OSError as exc:
+                    # The symbols stay queued for the next write
+                    logger.error(f"could not write {self.path}: {type(exc).__name__}: {exc}")
+
+    def flush(self):
+        # Symbols added while a write is running wait for the next one
+        with self._write_lock:
+            with self._lock:
+                symbols, self._pending = self._pending, {}
+            if not symbols:
+                return
+            try:
+                self._write(symbols)
+            except Exception:
+                with self._lock:
+                    # Keep them for the next flush, newer symbols with the same name win
+                    self._pending = {**symbols, **self._pending}
+                raise
+
+    def _write(self, symbols):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                content = file.read()
+        except FileNotFoundError:
+            content = ""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        partial = f"{self.path}.{os.getpid()}.part"
+        with open(partial, "w", encoding="utf-8", newline="\n") as file:
+            file.write(merge_symbols(content, symbols))
+        os.replace(partial, self.path)
+        logger.info(f"wrote {len(symbols)} symbols to {self.path}")
+
+
+def get_symbol_library_writer(path):
+    path = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = SymbolLibraryWriter(path)
+        return writer
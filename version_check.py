@@ -0,0 +1,139 @@
+# Latest JLC2KiCadLib version on PyPI, checked in the background and cached in the user cache folder.
+# Within version_check_ttl_hours the cached answer is used as is; after that PyPI is asked again
+# with If-None-Match/If-Modified-Since, so an unchanged release costs a 304 without a body.
+# A failed check is remembered for FAILED_CHECK_TTL, PyPI isn't asked again before that.
+import json
+import logging
+import os
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from .core_library_installer import CORE_PACKAGE, pypi_url
+from .plugin_config import get_setting, user_cache_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+VERSION_CACHE_FILE = "core_version.json"
+CHECK_TIMEOUT = 4
+FAILED_CHECK_TTL = 15 * 60
+
+_cache = None
+_cache_lock = threading.Lock()
+# One check at a time, a caller arriving meanwhile gets its answer
+_check_lock = threading.Lock()
+
+
+def _cache_path():
+    return os.path.join(user_cache_dir(), VERSION_CACHE_FILE)
+
+
+def _load_cache():
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            try:
+                with open(_cache_path(), "r", encoding="utf-8") as file:
+                    _cache = json.load(file)
+            except (OSError, ValueError):
+                _cache = {}
+            # A cached answer from another index doesn't count
+            if _cache.get("url") != pypi_url():
+                _cache = {}
+        return dict(_cache)
+
+
+def _save_cache(entry):
+    global _cache
+
+    with _cache_lock:
+        _cache = dict(entry)
+        path = _cache_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial = f"{path}.{threading.get_ident()}.part"
+            with open(partial, "w", encoding="utf-8") as file:
+                json.dump(entry, file)
+            os.replace(partial, path)
+        except OSError as exc:
+            logger.warning(f"could not write {path}: {type(exc).__name__}: {exc}")
+
+
+def _is_fresh(entry):
+    ttl = float(get_setting("version_check_ttl_hours")) * 3600
+    return bool(entry.get("version")) and time.time() - entry.get("checked", 0) < ttl
+
+
+def cached_latest_core_version():
+    # The last known latest version, however old, or None; never touches the network
+    return _load_cache().get("version")
+
+
+def _conditional_get(url, headers, timeout):
+    # Returns (status, headers, body), with requests when it is available
+    try:
+        from .http_client import get
+    except ImportError:
+        try:
+            with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+                return response.status, response.headers, response.read()
+        except HTTPError as exc:
+            if exc.code == 304:
+                return 304, exc.headers, b""
+            raise
+    response = get(url, headers=headers, timeout=timeout)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response.status_code, response.headers, response.content
+
+
+def get_latest_core_version(force=False, timeout=CHECK_TIMEOUT):
+    # Blocking, returns the cached version while it is fresh unless force. When PyPI can't be reached
+    # the last known version is returned, None if there is none.
+    with _check_lock:
+        entry = _load_cache()
+        if not force and (_is_fresh(entry) or time.time() - entry.get("failed", 0) < FAILED_CHECK_TTL):
+            return entry.get("version")
+
+        url = f"{pypi_url()}/pypi/{CORE_PACKAGE}/json"
+        headers = {}
+        if entry.get("version") and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("version") and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            status, response_headers, body = _conditional_get(url, headers, timeout)
+            if status != 304:
+                entry = {
+                    "version": json.loads(body.decode("utf-8")).get("info", {}).get("version"),
+                    "etag": response_headers.get("ETag", ""),
+                    "last_modified": response_headers.get("Last-Modified", ""),
+                }
+        except Exception as exc:
+            logger.info(f"{CORE_PACKAGE} version check failed: {type(exc).__name__}: {exc}")
+            entry["url"] = pypi_url()
+            entry["failed"] = time.time()
+            _save_cache(entry)
+            return entry.get("version")
+
+        entry.pop("failed", None)
+        entry["url"] = pypi_url()
+        entry["checked"] = time.time()
+        _save_cache(entry)
+        return entry.get("version")
+
+
+def check_in_background(callback=None):
+    # Runs get_latest_core_version on a daemon thread, callback(version) is called on that thread
+    def run():
+        version = get_latest_core_version()
+        if callback is not None:
+            callback(version)
+
+    thread = threading.Thread(target=run, name="jlc-version-check", daemon=True)
+    thread.start()
+    return thread